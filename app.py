@@ -1,23 +1,218 @@
+import atexit
+import gzip
+import hashlib
+import json
 import logging
-from flask import Flask, render_template, request, jsonify
+import os
+import time
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
-from scraper import FlipkartScraper, AmazonScraper, CromaScraper  # Import all scraper classes
+from scraper import create_chrome_driver, fetch_path_stats
+import http_fetch
+import resource_blocking
+import archive
+from cache import ResultCache
+import jobqueue
+import matching
+import metrics
+import results
+from driver_pool import DriverPool
+import search as search_service
+import watchlist
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; DEBUG logs every scraped product, so it is opt-in
+logging.basicConfig(level=os.environ.get("PRICE_SCOUT_LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 
-def is_relevant_product(product, query):
-    """Check if the product title is relevant to the query."""
-    if not product or 'title' not in product:
-        return False
-    title = product['title'].lower()
-    query_terms = query.lower().split()
-    return all(term in title for term in query_terms)
+# Per-source stage timings in a Server-Timing header, visible in browser dev tools
+SERVER_TIMING = os.environ.get("PRICE_SCOUT_SERVER_TIMING", "1") == "1"
+
+MAX_PAGE_SIZE = 100
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_SIZE = 1024
+GZIP_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+
+# Services are built by init_services(), not at import: scrape workers are spawned processes
+# that re-run the main module (as __mp_main__), and must not open browsers, caches or databases
+driver_pool = None
+result_cache = None
+job_queue = None
+price_history = None
+watch_scheduler = None
+
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def init_services():
+    """Create the driver pool, caches, queue and price history, and register their shutdown."""
+    global driver_pool, result_cache, job_queue, price_history, watch_scheduler
+    if driver_pool is not None:
+        return
+    # Shared pool of warm Chrome instances; bounds the number of browsers across concurrent searches
+    driver_pool = DriverPool(
+        create_chrome_driver,
+        size=int(os.environ.get("PRICE_SCOUT_POOL_SIZE", "3")),
+        max_uses=int(os.environ.get("PRICE_SCOUT_DRIVER_MAX_USES", "50")),
+        origins=search_service.site_origins(),
+    )
+    atexit.register(driver_pool.shutdown)
+
+    # Per-source search results; PRICE_SCOUT_CACHE_DB makes them survive restarts
+    result_cache = ResultCache(
+        max_entries=int(os.environ.get("PRICE_SCOUT_CACHE_SIZE", "512")),
+        default_ttl=float(os.environ.get("PRICE_SCOUT_CACHE_TTL", "600")),
+        ttls={
+            source: float(os.environ[f"PRICE_SCOUT_{source.upper()}_CACHE_TTL"])
+            for source in search_service.SCRAPERS
+            if f"PRICE_SCOUT_{source.upper()}_CACHE_TTL" in os.environ
+        },
+        stale_grace=float(os.environ.get("PRICE_SCOUT_CACHE_GRACE", "300")),
+        db_path=os.environ.get("PRICE_SCOUT_CACHE_DB"),
+    )
+    atexit.register(result_cache.close)
+
+    # With PRICE_SCOUT_WORKERS > 0, scrapes run in worker processes behind a bounded queue
+    job_queue = jobqueue.from_environment()
+    if job_queue is not None:
+        search_service.set_job_queue(job_queue)
+        atexit.register(job_queue.shutdown)
+
+    # With PRICE_SCOUT_HISTORY_DB set, scraped prices are kept and watched queries re-scraped on a schedule
+    price_history = watchlist.from_environment()
+    watch_scheduler = None
+    if price_history is not None:
+        search_service.set_price_history(price_history)
+        watch_scheduler = watchlist.scheduler_from_environment(price_history, search_service, driver_pool)
+        atexit.register(price_history.close)
+        atexit.register(watch_scheduler.shutdown)
+
+    atexit.register(search_service.shutdown)
+    atexit.register(http_fetch.close)
+    atexit.register(archive.close)
+
+    metrics.REGISTRY.gauge("price_scout_driver_pool", "Chrome drivers in the pool", ["state"],
+                           lambda: {("live",): driver_pool.stats()["live"], ("idle",): driver_pool.stats()["idle"]})
+    metrics.REGISTRY.gauge("price_scout_cache_entries", "Entries in the result cache", (),
+                           lambda: {(): result_cache.stats()["entries"]})
+    metrics.REGISTRY.gauge("price_scout_breaker_state", "Circuit breaker per source (0 closed, 1 half-open, 2 open)", ["source"],
+                           lambda: {(source,): _BREAKER_STATES[info["breaker"]] for source, info in search_service.health_registry.snapshot().items()})
+    metrics.REGISTRY.gauge("price_scout_queue_jobs", "Scrape jobs in the worker queue", ["state"],
+                           lambda: {(state,): job_queue.stats()[state] for state in ("depth", "running")} if job_queue else {})
+
+def queue_full_response(error):
+    response = jsonify({"error": str(error)})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+def requested_limit():
+    """The ?limit= products-per-source for this request; raises ValueError if out of range."""
+    try:
+        limit = int(request.args.get('limit', search_service.DEFAULT_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= search_service.MAX_LIMIT:
+        raise ValueError(f"limit must be an integer between 1 and {search_service.MAX_LIMIT}")
+    return limit
+
+def history_unavailable():
+    return jsonify({"error": "Price history is disabled; set PRICE_SCOUT_HISTORY_DB"}), 503
+
+def history_filters():
+    """link or q, plus optional source and a time window (since/until timestamps, or window seconds)."""
+    link = request.args.get('link')
+    query = request.args.get('q')
+    if not link and not query:
+        raise ValueError("link or q is required")
+    since = request.args.get('since', type=float)
+    if since is None and request.args.get('window', type=float):
+        since = time.time() - request.args.get('window', type=float)
+    return {
+        "link": link,
+        "query": query,
+        "source": request.args.get('source'),
+        "since": since,
+        "until": request.args.get('until', type=float),
+    }
+
+def listing_params(query):
+    """Sort, filter and pagination arguments for results.select(); raises ValueError on bad input,
+    so a bad request is rejected before anything is scraped."""
+    def number(name):
+        value = request.args.get(name)
+        if value in (None, ""):
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number")
+
+    sources = [source for source in request.args.get('source', '').split(',') if source]
+    unknown = [source for source in sources if source not in search_service.SCRAPERS]
+    if unknown:
+        raise ValueError(f"Unknown source: {', '.join(unknown)}")
+    sort = request.args.get('sort', 'relevance')
+    if sort not in results.SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(results.SORTS)}")
+    page_size = request.args.get('page_size')
+    if page_size not in (None, ""):
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            page_size = 0
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be an integer between 1 and {MAX_PAGE_SIZE}")
+    else:
+        page_size = None
+    params = {
+        "sort": sort,
+        "min_price": number('min_price'),
+        "max_price": number('max_price'),
+        "min_rating": number('min_rating'),
+        "sources": set(sources),
+        "page_size": page_size,
+        "cursor": request.args.get('cursor'),
+    }
+    if params["cursor"]:
+        scope = results.fingerprint(query, sort, params["min_price"], params["max_price"], params["min_rating"], params["sources"])
+        results.decode_cursor(params["cursor"], scope)
+    return params
+
+def add_cache_headers(response, sources):
+    """Summarize per-source cache outcomes as X-Cache / X-Cache-Sources / Age headers."""
+    states = {source: info.get("cache", "miss") for source, info in sources.items()}
+    if all(state == "hit" for state in states.values()):
+        overall = "HIT"
+    elif all(state == "miss" for state in states.values()):
+        overall = "MISS"
+    elif "miss" not in states.values():
+        overall = "STALE"
+    else:
+        overall = "PARTIAL"
+    response.headers["X-Cache"] = overall
+    response.headers["X-Cache-Sources"] = ", ".join(f"{source}={state.upper()}" for source, state in states.items())
+    ages = [info["age"] for info in sources.values() if "age" in info]
+    if ages:
+        response.headers["Age"] = str(max(ages))
+
+@app.after_request
+def compress_response(response):
+    """gzip JSON/text bodies for clients that accept it; streamed and file responses pass through."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers or response.mimetype not in GZIP_MIMETYPES):
+        return response
+    response.vary.add("Accept-Encoding")
+    if "gzip" not in request.headers.get("Accept-Encoding", ""):
+        return response
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=5))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
 
 @app.route('/')
 def index():
@@ -29,45 +224,177 @@ def api_search():
     query = request.args.get('q')
     if not query:
         return jsonify({"error": "No query provided"}), 400
+    try:
+        limit = requested_limit()
+        params = listing_params(query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # cached=1 sorts/filters/pages what earlier searches stored, without scraping
+    cache_only = request.args.get('cached') == '1'
 
-    logger.info(f"Received search query: {query}")
-    products = []
-
-    # Initialize all scrapers
-    croma_scraper = CromaScraper()
-    amazon_scraper = AmazonScraper()
-    flipkart_scraper = FlipkartScraper()
+    logger.info("Received search query: %s", query)
 
     try:
-        # Scrape in the specified order: Flipkart first, Amazon second, Croma last
-        flipkart_products = flipkart_scraper.scrape(query)
-        filtered_flipkart_products = [p for p in flipkart_products if is_relevant_product(p, query)]
-        if filtered_flipkart_products:  # Only extend if there are relevant products
-            products.extend(filtered_flipkart_products)
-            logger.debug(f"Added {len(filtered_flipkart_products)} relevant Flipkart products")
-
-        amazon_products = amazon_scraper.scrape(query)
-        filtered_amazon_products = [p for p in amazon_products if is_relevant_product(p, query)]
-        if filtered_amazon_products:  # Only extend if there are relevant products
-            products.extend(filtered_amazon_products)
-            logger.debug(f"Added {len(filtered_amazon_products)} relevant Amazon products")
-
-        croma_products = croma_scraper.scrape(query)
-        filtered_croma_products = [p for p in croma_products if is_relevant_product(p, query)]
-        if filtered_croma_products:  # Only extend if there are relevant products
-            products.extend(filtered_croma_products)
-            logger.debug(f"Added {len(filtered_croma_products)} relevant Croma products")
-
-        logger.info(f"Returning {len(products)} relevant products for query: {query} from active platforms")
-        return jsonify(products)
+        started = time.perf_counter()
+        # Only scrape the stores the source filter keeps
+        wanted = [source for source in search_service.SCRAPERS if source in params["sources"]] or None
+        products, sources = search_service.search(
+            query, pool=driver_pool, sources=wanted, cache=result_cache, limit=limit, cache_only=cache_only
+        )
+        elapsed = time.perf_counter() - started
+        metrics.SEARCH_SECONDS.observe(elapsed, endpoint="search")
+        logger.info("Returning %d relevant products for query: %s from active platforms", len(products), query)
+        listing = results.select(products, query, **params)
+        payload = dict(listing, sources=sources)
+        if not params["cursor"]:
+            # The same phone listed by several stores, with the cheapest offer and price spread
+            payload["groups"] = matching.group_products(results.filter_products(
+                products, params["min_price"], params["max_price"], params["min_rating"], params["sources"]
+            ))
+        response = jsonify(payload)
+        add_cache_headers(response, sources)
+        if SERVER_TIMING:
+            response.headers["Server-Timing"] = metrics.server_timing(sources, round(elapsed * 1000, 1))
+        # Source timings and ages change on every call, so the ETag covers the results only
+        content = json.dumps([listing, payload.get("groups")], sort_keys=True, default=str)
+        response.set_etag(hashlib.sha1(content.encode("utf-8")).hexdigest(), weak=True)
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+    except jobqueue.QueueFull as e:
+        logger.warning(f"Rejecting search for {query}: {str(e)}")
+        return queue_full_response(e)
     except Exception as e:
         logger.error(f"Error during search: {str(e)}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        croma_scraper.close()
-        amazon_scraper.close()
-        flipkart_scraper.close()
+
+@app.route('/api/search/stream', methods=['GET'])
+def api_search_stream():
+    """Stream each source's products as NDJSON as soon as it is scraped, then a summary line."""
+    query = request.args.get('q')
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+    try:
+        limit = requested_limit()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    logger.info("Received streaming search query: %s", query)
+    if job_queue is not None and job_queue.free_slots() == 0:
+        return queue_full_response(job_queue.reject())
+
+    def generate():
+        started = time.perf_counter()
+        try:
+            for event in search_service.iter_search(query, pool=driver_pool, cache=result_cache, limit=limit):
+                yield json.dumps(event) + "\n"
+            metrics.SEARCH_SECONDS.observe(time.perf_counter() - started, endpoint="stream")
+        except Exception as e:
+            logger.error(f"Error during streaming search: {str(e)}")
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # Keep reverse proxies from buffering the stream
+    return response
+
+@app.route('/api/fetch-stats', methods=['GET'])
+def api_fetch_stats():
+    return jsonify(fetch_path_stats())
+
+@app.route('/api/health', methods=['GET'])
+def api_health():
+    return jsonify(search_service.health_registry.snapshot())
+
+@app.route('/api/queue', methods=['GET'])
+def api_queue():
+    if job_queue is None:
+        return jsonify({"workers": 0, "mode": "inline"})
+    return jsonify(job_queue.stats())
+
+@app.route('/api/watchlist', methods=['GET'])
+def api_watchlist():
+    if price_history is None:
+        return history_unavailable()
+    return jsonify({"watches": price_history.watches(), "scheduler": watch_scheduler.stats()})
+
+@app.route('/api/watchlist', methods=['POST'])
+def api_add_watch():
+    if price_history is None:
+        return history_unavailable()
+    body = request.get_json(silent=True) or {}
+    query = body.get('q')
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+    source = body.get('source')
+    if source is not None and source not in search_service.SCRAPERS:
+        return jsonify({"error": f"Unknown source: {source}"}), 400
+    try:
+        interval = float(body.get('interval', 3600))
+        result_limit = int(body['limit']) if body.get('limit') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "interval and limit must be numbers"}), 400
+    if interval < 60:
+        return jsonify({"error": "interval must be at least 60 seconds"}), 400
+    if result_limit is not None and not 1 <= result_limit <= search_service.MAX_LIMIT:
+        return jsonify({"error": f"limit must be an integer between 1 and {search_service.MAX_LIMIT}"}), 400
+    watch = price_history.add_watch(query, source=source, link=body.get('link'), interval=interval, result_limit=result_limit)
+    return jsonify(watch), 201
+
+@app.route('/api/watchlist/<int:watch_id>', methods=['DELETE'])
+def api_remove_watch(watch_id):
+    if price_history is None:
+        return history_unavailable()
+    if not price_history.remove_watch(watch_id):
+        return jsonify({"error": "No such watch"}), 404
+    return "", 204
+
+@app.route('/api/history', methods=['GET'])
+def api_history():
+    if price_history is None:
+        return history_unavailable()
+    try:
+        filters = history_filters()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = max(1, min(request.args.get('limit', 1000, type=int), 10000))
+    return jsonify({"observations": price_history.history(limit=limit, **filters)})
+
+@app.route('/api/history/stats', methods=['GET'])
+def api_history_stats():
+    if price_history is None:
+        return history_unavailable()
+    try:
+        filters = history_filters()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(price_history.stats(**filters))
+
+@app.route('/api/history/drops', methods=['GET'])
+def api_history_drops():
+    if price_history is None:
+        return history_unavailable()
+    try:
+        filters = history_filters()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    min_pct = request.args.get('min_pct', 5.0, type=float)
+    return jsonify({"drops": price_history.drops(min_pct=min_pct, **filters)})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/network-stats', methods=['GET'])
+def api_network_stats():
+    return jsonify(resource_blocking.network_totals())
 
 if __name__ == '__main__':
+    init_services()
     logger.info("Starting Flask server on http://127.0.0.1:5001")
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":  # Only warm browsers in the reloader child that serves requests
+        driver_pool.start(background=True)
+        if watch_scheduler is not None:
+            watch_scheduler.start()
+    app.run(debug=True, port=5001)
+elif __name__ != '__mp_main__':
+    init_services()  # Imported by a WSGI server or the load benchmark
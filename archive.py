@@ -0,0 +1,168 @@
+"""Optional archive of raw search-result pages, for offline re-parsing.
+
+With PRICE_SCOUT_ARCHIVE_DIR set, every page a scraper extracts cards from
+(HTTP HTML or the browser's page_source) is gzip-compressed and stored
+under its SHA-256, so identical pages are kept once:
+
+    <dir>/objects/ab/cdef...html.gz   page content
+    <dir>/archive.db                  one row per capture (source, query, url,
+                                      fetch path, cards extracted, timestamp)
+
+Compression and disk writes happen on a background thread; when it falls
+behind, captures are dropped rather than slowing scrapes down. Replay the
+archive with ``python -m bench.replay`` (see bench/replay.py).
+"""
+import gzip
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS pages ("
+    "id INTEGER PRIMARY KEY, digest TEXT NOT NULL, source TEXT NOT NULL, query TEXT NOT NULL, url TEXT, "
+    "path TEXT, cards INTEGER, size INTEGER NOT NULL, ts REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_pages_source_ts ON pages (source, ts)",
+]
+
+class PageArchive:
+    def __init__(self, root, max_pending=64):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "archive.db"), check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")  # Scrape worker processes share the database
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._counts = {"stored": 0, "deduplicated": 0, "dropped": 0}
+        self._writer = None
+
+    def capture(self, source, query, url, page_html, path=None, cards=None):
+        """Queue a page for archiving without blocking; returns False if it was dropped."""
+        self._start_writer()
+        try:
+            self._pending.put_nowait((source, query, url, page_html, path, cards, time.time()))
+            return True
+        except queue.Full:
+            with self._lock:
+                self._counts["dropped"] += 1
+            return False
+
+    def store(self, source, query, url, page_html, path=None, cards=None, ts=None):
+        """Write one page (content once per digest) and its capture row; returns the digest."""
+        data = page_html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self.object_path(digest)
+        stored = not os.path.exists(object_path)
+        if stored:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            temporary = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(gzip.compress(data, compresslevel=6))
+            os.replace(temporary, object_path)  # Atomic, so readers never see a partial object
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO pages (digest, source, query, url, path, cards, size, ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (digest, source, query, url, path, cards, len(data), ts or time.time()),
+                )
+            self._counts["stored" if stored else "deduplicated"] += 1
+        return digest
+
+    def object_path(self, digest):
+        return object_path(self.root, digest)
+
+    def load(self, digest):
+        return load_page(self.root, digest)
+
+    def pages(self, source=None, since=None, limit=None):
+        """Capture rows, newest first."""
+        where, params = [], []
+        if source:
+            where.append("source = ?")
+            params.append(source)
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        sql = "SELECT * FROM pages"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts, pending=self._pending.qsize())
+
+    def close(self, timeout=5):
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join(timeout)
+        with self._lock:
+            self._db.close()
+
+    def _start_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name="page-archive", daemon=True)
+                self._writer.start()
+
+    def _write_pending(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            try:
+                self.store(*item)
+            except Exception as e:
+                logger.warning(f"Error archiving {item[0]} page: {str(e)}")
+
+def object_path(root, digest):
+    return os.path.join(root, "objects", digest[:2], f"{digest[2:]}.html.gz")
+
+def load_page(root, digest):
+    """Decompressed page content; needs no database connection, so replay workers can call it."""
+    with gzip.open(object_path(root, digest), "rb") as f:
+        return f.read().decode("utf-8")
+
+ARCHIVE_DIR = os.environ.get("PRICE_SCOUT_ARCHIVE_DIR")
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_archive():
+    """This process's archive, or None when archiving is off (created lazily, so each
+    scrape worker process opens its own)."""
+    global _archive
+    if not ARCHIVE_DIR:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = PageArchive(ARCHIVE_DIR)
+        return _archive
+
+def capture(source, query, url, page_html, path=None, cards=None):
+    """Archive a page if archiving is on; never raises into the scrape."""
+    if not ARCHIVE_DIR or not page_html:
+        return
+    try:
+        get_archive().capture(source, query, url, page_html, path, cards)
+    except Exception as e:
+        logger.warning(f"Error archiving {source} page: {str(e)}")
+
+def close():
+    if _archive is not None:
+        _archive.close()
@@ -0,0 +1,163 @@
+"""Local stand-in for the Flipkart, Amazon and Croma search pages.
+
+Serves search-result pages with the markup the scrapers expect under one
+prefix per site, with configurable artificial latency:
+
+    /flipkart/search?q=...   server-rendered div[data-id] cards
+    /amazon/s?k=...          server-rendered s-search-result cards
+                             (both take &page=N for further result pages)
+    /croma/searchB?text=...  div.cp-product cards injected by JavaScript,
+                             like the real client-rendered page
+
+Point the scrapers at it with PRICE_SCOUT_<SOURCE>_BASE_URL (see
+base_urls()), or run it standalone:
+
+    python -m bench.fixture_server --port 8765 --latency 0.2
+"""
+import argparse
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+VARIANTS = ["", "Pro", "Plus", "Max", "Lite", "Neo", "Ultra", "Prime"]
+COLORS = ["Black", "Blue", "Green", "Pink", "Silver", "White"]
+STORAGE = [64, 128, 256, 512]
+
+def fixture_products(query, count, seed):
+    """Deterministic products whose titles contain every query term."""
+    rng = random.Random(f"{seed}:{query.lower()}")
+    base = " ".join(word.capitalize() for word in query.split())
+    products = []
+    for i in range(count):
+        storage = rng.choice(STORAGE)
+        products.append({
+            "id": f"{rng.randrange(10**10):010d}",
+            "name": f"{base} {VARIANTS[i % len(VARIANTS)]}".strip(),
+            "color": rng.choice(COLORS),
+            "storage": storage,
+            "price": rng.randrange(9999, 159999, 100),
+            "rating": round(rng.uniform(3.5, 4.9), 1),
+        })
+    return products
+
+def flipkart_page(query, products):
+    cards = "".join(
+        f'<div data-id="MOB{p["id"]}"><a href="/{p["id"]}/p/itm{p["id"]}?pid=MOB{p["id"]}">'
+        f'<img class="DByuf4" src="/static/img/{p["id"]}.jpeg" alt="">'
+        f'<div class="KzDlHZ">{html.escape(p["name"])} ({p["color"]}, {p["storage"]} GB)</div>'
+        f'<div class="XQDdHH">{p["rating"]}</div>'
+        f'<div class="Nx9bqj _4b5DiR">₹{p["price"]:,}</div></a></div>'
+        for p in products
+    )
+    return f'<!DOCTYPE html><html><head><title>{html.escape(query)} - Flipkart</title></head><body><div id="container">{cards}</div></body></html>'
+
+def amazon_page(query, products):
+    cards = "".join(
+        f'<div data-component-type="s-search-result" data-asin="B{p["id"]}">'
+        f'<a class="a-link-normal s-no-outline" href="/dp/B{p["id"]}"><img class="s-image" src="/images/I/{p["id"]}.jpg"></a>'
+        f'<h2 class="a-size-medium a-color-base a-text-normal" aria-label="{html.escape(p["name"])} ({p["storage"]} GB) - {p["color"]}">'
+        f'<span>{html.escape(p["name"])} ({p["storage"]}GB, {p["color"]})</span></h2>'
+        f'<a class="a-popover-trigger a-declarative" aria-label="{p["rating"]} out of 5 stars"></a>'
+        f'<span class="a-price"><span class="a-offscreen">₹{p["price"]:,}</span><span class="a-price-whole">{p["price"]:,}</span></span>'
+        f'</div>'
+        for p in products
+    )
+    return f'<!DOCTYPE html><html><head><title>Amazon.in : {html.escape(query)}</title></head><body><div class="s-main-slot">{cards}</div></body></html>'
+
+def croma_page(query, products, render_delay):
+    cards = [
+        f'<h3 class="product-title"><a href="/{p["id"]}/p/{p["id"]}">{html.escape(p["name"])} ({p["storage"]}GB RAM, {p["color"]})</a></h3>'
+        f'<span class="amount">₹{p["price"]:,}.00</span><span class="rating-text">{p["rating"]}</span>'
+        f'<img src="/medias/{p["id"]}.png">'
+        for p in products
+    ]
+    # Cards only exist after the script runs, so the HTTP fast path finds nothing here
+    return (
+        f'<!DOCTYPE html><html><head><title>{html.escape(query)} | Croma</title></head><body><ul id="product-list"></ul>'
+        f'<script>setTimeout(() => {{ const list = document.getElementById("product-list");'
+        f' for (const card of {json.dumps(cards)}) {{ const el = document.createElement("div");'
+        f' el.className = "cp-product"; el.innerHTML = card; list.appendChild(el); }} }}, {int(render_delay * 1000)});</script>'
+        f'</body></html>'
+    )
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "PriceScoutFixture/1.0"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        config = self.server.config
+        if config["latency"]:
+            time.sleep(config["latency"] + random.uniform(0, config["jitter"]))
+
+        count = config["products"]
+        page = int(params.get("page", ["1"])[0])
+        if parsed.path == "/flipkart/search":
+            query = params.get("q", [""])[0]
+            body = flipkart_page(query, fixture_products(query, count, f"flipkart:{page}"))
+        elif parsed.path == "/amazon/s":
+            query = params.get("k", [""])[0]
+            body = amazon_page(query, fixture_products(query, count, f"amazon:{page}"))
+        elif parsed.path == "/croma/searchB":
+            query = params.get("text", [""])[0]
+            body = croma_page(query, fixture_products(query, count, "croma"), config["render_delay"])
+        else:
+            self.send_error(404)
+            return
+
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(port=0, latency=0.0, jitter=0.0, products=24, render_delay=0.3):
+    """Start the fixture server on a background thread; returns the server (call shutdown() to stop)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.daemon_threads = True
+    server.config = {
+        "latency": latency,
+        "jitter": jitter,
+        "products": products,
+        "render_delay": render_delay,
+    }
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server
+
+def base_urls(server):
+    """PRICE_SCOUT_<SOURCE>_BASE_URL values pointing each scraper at the server."""
+    host, port = server.server_address[:2]
+    root = f"http://{host}:{port}"
+    return {
+        "PRICE_SCOUT_FLIPKART_BASE_URL": f"{root}/flipkart",
+        "PRICE_SCOUT_AMAZON_BASE_URL": f"{root}/amazon",
+        "PRICE_SCOUT_CROMA_BASE_URL": f"{root}/croma",
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fixture search pages for Price Scout benchmarks")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--products", type=int, default=24, help="product cards per page")
+    parser.add_argument("--render-delay", type=float, default=0.3, help="seconds before Croma cards are rendered")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.jitter, args.products, args.render_delay)
+    for name, value in base_urls(server).items():
+        print(f"export {name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
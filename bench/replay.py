@@ -0,0 +1,147 @@
+"""Re-parse archived search pages offline (see archive.py).
+
+    python -m bench.replay --archive pages/ --workers 8
+    python -m bench.replay --archive pages/ --source Flipkart > replay.json
+    python -m bench.replay --archive pages/ --baseline replay.json --fail-under 0.9
+
+Every archived capture goes through the current selectors
+(http_fetch.extract_cards) and the scraper's parse_card normalization in a
+process pool, one process per core by default. Per source the report gives
+the share of pages that still yield products, how often each field comes
+back empty (a selector that stopped matching shows up as a field near 1.0),
+pages yielding fewer cards than when they were captured, and per-page parse
+time percentiles. With --baseline (an earlier report), parse p95 slowdowns
+beyond --max-slowdown are flagged; they and --fail-under make the exit
+status non-zero, so the replay can gate a deploy.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import archive
+from bench.run_bench import summarize
+
+_scrapers = {}
+
+def _init_worker():
+    # Per-card parse warnings would flood the output across thousands of pages
+    logging.getLogger("scraper").setLevel(logging.ERROR)
+
+def _scraper(source):
+    scraper = _scrapers.get(source)
+    if scraper is None:
+        from scraper import AmazonScraper, CromaScraper, FlipkartScraper
+        classes = {cls.SOURCE: cls for cls in (FlipkartScraper, AmazonScraper, CromaScraper)}
+        # No driver is started; only the selectors and parse_card are used
+        scraper = _scrapers[source] = classes[source](max_products=10**6, fetch_strategy="http_first")
+    return scraper
+
+def replay_page(root, capture):
+    """Extract and parse one archived page; returns counts, missing fields and parse time."""
+    import http_fetch
+
+    result = {"id": capture["id"], "source": capture["source"], "recorded_cards": capture["cards"]}
+    try:
+        page_html = archive.load_page(root, capture["digest"])
+    except OSError as e:
+        result.update(error=f"{type(e).__name__}: {str(e)}", cards=0, products=0, parse_ms=0.0, missing={})
+        return result
+    scraper = _scraper(capture["source"])
+    cards, products = [], []
+    started = time.perf_counter()
+    try:
+        cards = http_fetch.extract_cards(page_html, capture["url"] or scraper.base_url, scraper.CARD_SELECTOR, scraper.FIELDS)
+        products = scraper.parse_cards(cards)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {str(e)}"
+    result["parse_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    result["cards"] = len(cards)
+    result["products"] = len(products)
+    result["missing"] = {field: sum(1 for card in cards if not card.get(field)) for field in scraper.FIELDS}
+    return result
+
+def summarize_source(results):
+    pages = len(results)
+    cards = sum(result["cards"] for result in results)
+    missing = {}
+    for result in results:
+        for field, count in result["missing"].items():
+            missing[field] = missing.get(field, 0) + count
+    parse_ms = [result["parse_ms"] for result in results if "error" not in result]
+    return {
+        "pages": pages,
+        "success_rate": round(sum(1 for result in results if result["products"]) / pages, 3) if pages else 0.0,
+        "errors": sum(1 for result in results if "error" in result),
+        "cards": cards,
+        "products": sum(result["products"] for result in results),
+        "missing_field_rate": {field: round(count / cards, 3) if cards else None for field, count in missing.items()},
+        "fewer_cards_than_recorded": sum(
+            1 for result in results if result["recorded_cards"] is not None and result["cards"] < result["recorded_cards"]
+        ),
+        "parse_ms": dict(summarize(parse_ms), max=round(max(parse_ms), 1) if parse_ms else 0.0),
+    }
+
+def check(report, fail_under=None, baseline=None, max_slowdown=1.5):
+    """Problems that should block a deploy."""
+    problems = []
+    for source, summary in report["sources"].items():
+        if fail_under is not None and summary["success_rate"] < fail_under:
+            problems.append(f"{source}: {summary['success_rate']:.1%} of pages yield products (< {fail_under:.0%})")
+        before = (baseline or {}).get("sources", {}).get(source, {}).get("parse_ms", {}).get("p95")
+        after = summary["parse_ms"]["p95"]
+        if before and after > before * max_slowdown:
+            problems.append(f"{source}: parse p95 {after}ms vs {before}ms in the baseline")
+    return problems
+
+def run(root, workers=None, source=None, since=None, limit=None):
+    captures = archive.PageArchive(root).pages(source=source, since=since, limit=limit)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        chunksize = max(1, len(captures) // (workers * 8))
+        results = list(executor.map(partial(replay_page, root), captures, chunksize=chunksize))
+    wall = time.perf_counter() - started
+
+    by_source = {}
+    for result in results:
+        by_source.setdefault(result["source"], []).append(result)
+    return {
+        "pages": len(results),
+        "workers": workers,
+        "wall_s": round(wall, 2),
+        "pages_per_s": round(len(results) / wall, 1) if wall else 0.0,
+        "sources": {name: summarize_source(source_results) for name, source_results in sorted(by_source.items())},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse archived Price Scout pages")
+    parser.add_argument("--archive", default=archive.ARCHIVE_DIR, help="archive directory (default PRICE_SCOUT_ARCHIVE_DIR)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--source", help="only replay this source's pages")
+    parser.add_argument("--since", type=float, help="only pages captured after this Unix timestamp")
+    parser.add_argument("--limit", type=int, help="replay at most this many (most recent) pages")
+    parser.add_argument("--baseline", help="earlier replay report to compare parse times against")
+    parser.add_argument("--max-slowdown", type=float, default=1.5, help="allowed parse p95 growth over the baseline")
+    parser.add_argument("--fail-under", type=float, help="minimum share of pages that must yield products")
+    args = parser.parse_args()
+    if not args.archive:
+        parser.error("--archive or PRICE_SCOUT_ARCHIVE_DIR is required")
+
+    report = run(args.archive, args.workers, args.source, args.since, args.limit)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    problems = check(report, args.fail_under, baseline, args.max_slowdown)
+    print(json.dumps(report, indent=2))
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
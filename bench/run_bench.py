@@ -0,0 +1,201 @@
+"""Offline benchmarks for Price Scout against the local fixture server.
+
+    python -m bench.run_bench stages --iterations 10
+    python -m bench.run_bench load --clients 8 --requests 80
+
+"stages" runs each scraper directly and reports per-stage timings (driver
+start, HTTP fetch, navigation, readiness wait, extraction, parsing,
+relevance filtering). "load" serves the Flask app in-process and drives
+/api/search with N concurrent clients, reporting latency percentiles,
+throughput and peak RSS of the server process and its browsers.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from bench.fixture_server import base_urls, start_server
+
+try:
+    import psutil
+except ImportError:  # Peak RSS falls back to getrusage, which misses live browser children
+    psutil = None
+
+QUERIES = ["iphone 15", "galaxy s24", "pixel 8", "oneplus 12", "redmi note 13", "vivo v30"]
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(values):
+    return {
+        "n": len(values),
+        "mean": round(statistics.mean(values), 1) if values else 0.0,
+        "p50": round(percentile(values, 50), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+    }
+
+class RssSampler:
+    """Tracks peak resident memory of this process plus its children (Chrome, chromedriver)."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if psutil is None:
+            # ru_maxrss is KiB on Linux; children only count once they have exited
+            usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            self.peak_bytes = usage * 1024
+
+    def _run(self):
+        if psutil is None:
+            return
+        process = psutil.Process()
+        while not self._stop.is_set():
+            total = 0
+            for proc in [process] + process.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.peak_bytes = max(self.peak_bytes, total)
+            self._stop.wait(self.interval)
+
+def run_stages(args):
+    # Imported after the base URLs are in the environment
+    import search
+    from driver_pool import DriverPool
+    from scraper import create_chrome_driver
+
+    pool = DriverPool(create_chrome_driver, size=len(search.SCRAPERS), origins=search.site_origins()) if args.pool else None
+    if pool:
+        pool.start()
+    timings = {}
+    try:
+        for iteration in range(args.iterations):
+            query = QUERIES[iteration % len(QUERIES)]
+            for source in search.SCRAPERS:
+                started = time.perf_counter()
+                products, status = search.run_source(source, query, pool)
+                total_ms = (time.perf_counter() - started) * 1000
+                source_timings = timings.setdefault(source, {})
+                for stage, ms in status["timings_ms"].items():
+                    source_timings.setdefault(stage, []).append(ms)
+                source_timings.setdefault("total", []).append(total_ms)
+                source_timings.setdefault(f"path:{status['path']}", []).append(1)
+                print(f"{source:<9} {query!r:<16} {len(products)} products via {status['path']} in {total_ms:.0f}ms", file=sys.stderr)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    report = {}
+    for source, stages in timings.items():
+        report[source] = {
+            stage: (len(values) if stage.startswith("path:") else summarize(values))
+            for stage, values in stages.items()
+        }
+    return report
+
+def run_load(args):
+    from werkzeug.serving import make_server
+    import app as app_module
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/search"
+    if args.pool_warm:
+        app_module.driver_pool.start()
+
+    def one_request(i):
+        query = QUERIES[i % len(QUERIES)]
+        if args.unique_queries:
+            query = f"{query} {i}"
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(f"{url}?q={quote(query)}&limit={args.limit}", timeout=args.timeout) as response:
+                json.loads(response.read())
+                ok = response.status == 200
+        except Exception:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    try:
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.clients) as executor:
+                results = list(executor.map(one_request, range(args.requests)))
+            wall = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        app_module.driver_pool.shutdown()
+
+    latencies = [ms for ms, ok in results if ok]
+    return {
+        "browser_mode": os.environ.get("PRICE_SCOUT_BROWSER_MODE", "per_site"),
+        "clients": args.clients,
+        "limit": args.limit,
+        "requests": args.requests,
+        "errors": sum(1 for _, ok in results if not ok),
+        "latency_ms": summarize(latencies),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "wall_s": round(wall, 2),
+        "peak_rss_mb": round(rss.peak_bytes / (1024 * 1024), 1),
+        "rss_source": "psutil" if psutil else "getrusage",
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Price Scout benchmarks")
+    parser.add_argument("--latency", type=float, default=0.05, help="fixture server latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="fixture server random extra latency (s)")
+    parser.add_argument("--products", type=int, default=24, help="product cards per fixture page")
+    parser.add_argument("--render-delay", type=float, default=0.3, help="delay before Croma cards render (s)")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    stages = subparsers.add_parser("stages", help="per-stage scraper timings")
+    stages.add_argument("--iterations", type=int, default=5)
+    stages.add_argument("--pool", action="store_true", help="lease warm drivers instead of starting one per scrape")
+
+    load = subparsers.add_parser("load", help="load-test /api/search")
+    load.add_argument("--clients", type=int, default=4)
+    load.add_argument("--requests", type=int, default=40)
+    load.add_argument("--timeout", type=float, default=120)
+    load.add_argument("--limit", type=int, default=3, help="products per source (paginates past one page)")
+    load.add_argument("--unique-queries", action="store_true", help="defeat the result cache and request coalescing")
+    load.add_argument("--pool-warm", action="store_true", help="pre-warm the driver pool before the run")
+    load.add_argument("--browser-mode", choices=["per_site", "multitab"], help="one browser per site, or one tab per site")
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, jitter=args.jitter, products=args.products, render_delay=args.render_delay)
+    os.environ.update(base_urls(server))
+    if args.mode == "load" and args.unique_queries:
+        os.environ.setdefault("PRICE_SCOUT_CACHE_SIZE", "0")
+    if args.mode == "load" and args.browser_mode:
+        os.environ["PRICE_SCOUT_BROWSER_MODE"] = args.browser_mode
+    try:
+        report = run_stages(args) if args.mode == "stages" else run_load(args)
+    finally:
+        server.shutdown()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def normalize_query(query):
+    """Queries differing only in case or whitespace share cache entries."""
+    return " ".join(query.lower().split())
+
+class CacheEntry:
+    def __init__(self, value, stored_at):
+        self.value = value
+        self.stored_at = stored_at
+
+    def age(self, now=None):
+        return (now or time.time()) - self.stored_at
+
+class ResultCache:
+    """LRU cache of per-source search results with TTLs and a stale grace window.
+
+    Entries younger than the source's TTL are "fresh"; entries up to
+    ``stale_grace`` seconds past the TTL are "stale" and may be served while
+    a refresh runs; anything older is dropped. When ``db_path`` is set,
+    entries are written through to SQLite so they survive restarts.
+    """
+
+    FRESH = "hit"
+    STALE = "stale"
+
+    def __init__(self, max_entries=512, default_ttl=600, ttls=None, stale_grace=300, db_path=None):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.stale_grace = stale_grace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "query TEXT NOT NULL, source TEXT NOT NULL, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "PRIMARY KEY (query, source))"
+            )
+            self._db.commit()
+
+    def ttl(self, source):
+        return self.ttls.get(source, self.default_ttl)
+
+    def get(self, query, source):
+        """Return (value, state, age in seconds), or None on a miss."""
+        key = (normalize_query(query), source)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key)
+                if entry is not None:
+                    self._store(key, entry)
+            if entry is None:
+                return None
+            age = entry.age(now)
+            ttl = self.ttl(source)
+            if age > ttl + self.stale_grace:
+                self._delete(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.value, self.FRESH if age <= ttl else self.STALE, age
+
+    def set(self, query, source, value):
+        key = (normalize_query(query), source)
+        entry = CacheEntry(value, time.time())
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO search_cache (query, source, value, stored_at) VALUES (?, ?, ?, ?)",
+                        (key[0], key[1], json.dumps(value), entry.stored_at),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Error persisting cache entry: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM search_cache")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _delete(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM search_cache WHERE query = ? AND source = ?", key)
+            self._db.commit()
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT value, stored_at FROM search_cache WHERE query = ? AND source = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1])
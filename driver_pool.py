@@ -0,0 +1,153 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+import resource_blocking
+
+class PoolClosedError(RuntimeError):
+    pass
+
+class DriverPool:
+    """Process-wide pool of warm WebDriver instances leased to scrapers.
+
+    At most ``size`` drivers exist at once; callers block in ``acquire`` until
+    one is free. Drivers are reset between leases and recycled once they fail
+    a health check or have served ``max_uses`` leases. Storage can only be
+    cleared per origin, so ``origins`` lists the sites whose localStorage and
+    IndexedDB are wiped on reset (see search.site_origins()).
+    """
+
+    def __init__(self, factory, size=3, max_uses=50, acquire_timeout=60, origins=()):
+        self.logger = logging.getLogger(__name__)
+        self.factory = factory
+        self.origins = tuple(origins)
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._uses = {}
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self, background=False):
+        """Pre-warm the pool up to its full size."""
+        if background:
+            threading.Thread(target=self.start, name="driver-pool-warmup", daemon=True).start()
+            return
+        for _ in range(self.size):
+            if not self._slots.acquire(blocking=False):
+                break
+            try:
+                driver = self._create()
+                with self._lock:
+                    self._idle.append(driver)
+            except Exception as e:
+                self.logger.error(f"Error pre-warming ChromeDriver: {str(e)}")
+            finally:
+                self._slots.release()
+        self.logger.info(f"Driver pool warmed with {len(self._idle)} of {self.size} drivers")
+
+    def acquire(self, timeout=None):
+        if self._closed:
+            raise PoolClosedError("Driver pool is shut down")
+        timeout = self.acquire_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No WebDriver available within {timeout}s")
+        try:
+            while True:
+                with self._lock:
+                    driver = self._idle.pop() if self._idle else None
+                if driver is None:
+                    driver = self._create()
+                    break
+                if self._is_healthy(driver):
+                    break
+                self.logger.warning("Discarding unhealthy pooled ChromeDriver")
+                self._destroy(driver)
+            with self._lock:
+                self._uses[driver] = self._uses.get(driver, 0) + 1
+            return driver
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver):
+        try:
+            with self._lock:
+                uses = self._uses.get(driver, 0)
+            if self._closed:
+                self._destroy(driver)
+            elif uses >= self.max_uses:
+                self.logger.info(f"Recycling ChromeDriver after {uses} uses")
+                self._destroy(driver)
+            elif not self._reset(driver):
+                self.logger.warning("Recycling ChromeDriver that failed to reset")
+                self._destroy(driver)
+            else:
+                with self._lock:
+                    self._idle.append(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._destroy(driver)
+        self.logger.info("Driver pool shut down")
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "live": len(self._uses), "idle": len(self._idle)}
+
+    def _create(self):
+        driver = self.factory()
+        with self._lock:
+            self._uses[driver] = 0
+        return driver
+
+    def _destroy(self, driver):
+        with self._lock:
+            self._uses.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Error closing pooled ChromeDriver: {str(e)}")
+
+    def _is_healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Drop extra tabs, cookies and storage so the next lease starts clean."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            try:
+                resource_blocking.clear_profile(driver)
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+            for origin in self.origins:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            self.logger.debug(f"ChromeDriver reset failed: {str(e)}")
+            return False
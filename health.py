@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from collections import deque
+
+class SourceHealth:
+    """Rolling latency/failure stats and a circuit breaker for one source.
+
+    The breaker opens once at least ``min_samples`` recent scrapes have a
+    failure rate of ``failure_threshold`` or more. After ``cooldown`` seconds
+    one trial scrape is let through (half-open); its outcome closes the
+    breaker again or re-opens it for another cool-down. A trial that is
+    never run is handed back with release_trial(), and one that reports no
+    outcome within ``cooldown`` seconds is given up on, so the breaker can't
+    stay half-open forever.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, source, window=50, min_samples=5, failure_threshold=0.5, cooldown=60,
+                 min_timeout=5, max_timeout=20, timeout_factor=1.5):
+        self.source = source
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self._outcomes = deque(maxlen=window)  # True for success
+        self._latencies = deque(maxlen=window)  # Seconds end to end, successful scrapes only
+        self._ready_latencies = deque(maxlen=window)  # Seconds waiting for cards, Selenium scrapes only
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow_request(self):
+        """Whether a scrape may run now; in half-open state only the single trial is allowed."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self._state == self.OPEN and now - self._opened_at >= self.cooldown:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and self._trial_in_flight and now - self._trial_started >= self.cooldown:
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started = now
+                return True
+            return False
+
+    def release_trial(self):
+        """Hand back a half-open trial that allow_request() granted but that was never run."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record(self, success, latency=None, ready_latency=None):
+        with self._lock:
+            self._outcomes.append(success)
+            if success and latency is not None:
+                self._latencies.append(latency)
+            if success and ready_latency is not None:
+                self._ready_latencies.append(ready_latency)
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if success:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+            elif self._state == self.CLOSED and len(self._outcomes) >= self.min_samples:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_threshold:
+                    self._open()
+
+    def latency_percentile(self, pct, ready=False):
+        with self._lock:
+            latencies = sorted(self._ready_latencies if ready else self._latencies)
+        return _percentile(latencies, pct)
+
+    def adaptive_timeout(self):
+        """Readiness timeout scaled from the observed readiness p95, clamped to
+        [min_timeout, max_timeout]; None (the scraper's own default) until there
+        are enough samples."""
+        with self._lock:
+            latencies = sorted(self._ready_latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        p95 = _percentile(latencies, 95)
+        return round(min(self.max_timeout, max(self.min_timeout, p95 * self.timeout_factor)), 1)
+
+    def snapshot(self):
+        with self._lock:
+            samples = len(self._outcomes)
+            failures = self._outcomes.count(False)
+            state = self._state
+            opened_at = self._opened_at
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        snapshot = {
+            "breaker": state,
+            "samples": samples,
+            "failure_rate": round(failures / samples, 3) if samples else 0.0,
+            "latency_p50_s": round(p50, 2) if p50 is not None else None,
+            "latency_p95_s": round(p95, 2) if p95 is not None else None,
+            "ready_timeout_s": self.adaptive_timeout(),
+        }
+        if state != self.CLOSED:
+            snapshot["retry_in_s"] = max(0, round(self.cooldown - (time.monotonic() - opened_at), 1))
+        return snapshot
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+class HealthRegistry:
+    def __init__(self, **settings):
+        self.settings = settings
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def get(self, source):
+        with self._lock:
+            health = self._sources.get(source)
+            if health is None:
+                health = self._sources[source] = SourceHealth(source, **self.settings)
+            return health
+
+    def snapshot(self):
+        with self._lock:
+            sources = list(self._sources.values())
+        return {health.source: health.snapshot() for health in sources}
+
+def from_environment():
+    return HealthRegistry(
+        window=int(os.environ.get("PRICE_SCOUT_HEALTH_WINDOW", "50")),
+        min_samples=int(os.environ.get("PRICE_SCOUT_BREAKER_MIN_SAMPLES", "5")),
+        failure_threshold=float(os.environ.get("PRICE_SCOUT_BREAKER_FAILURE_RATE", "0.5")),
+        cooldown=float(os.environ.get("PRICE_SCOUT_BREAKER_COOLDOWN", "60")),
+        min_timeout=float(os.environ.get("PRICE_SCOUT_MIN_READY_TIMEOUT", "5")),
+        max_timeout=float(os.environ.get("PRICE_SCOUT_MAX_READY_TIMEOUT", "20")),
+    )
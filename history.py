@@ -0,0 +1,181 @@
+import logging
+import sqlite3
+import threading
+import time
+
+from cache import normalize_query
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS price_observations ("
+    "id INTEGER PRIMARY KEY, ts REAL NOT NULL, query TEXT NOT NULL, source TEXT NOT NULL, "
+    "link TEXT NOT NULL, title TEXT, price REAL NOT NULL)",
+    # Per-product history and drops walk (link, ts); per-search stats walk (query, source, ts),
+    # which also carries price so min/max/avg never touch the table
+    "CREATE INDEX IF NOT EXISTS idx_price_observations_link_ts ON price_observations (link, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_price_observations_query_source_ts ON price_observations (query, source, ts, price)",
+    "CREATE TABLE IF NOT EXISTS watches ("
+    "id INTEGER PRIMARY KEY, query TEXT NOT NULL, source TEXT, link TEXT, result_limit INTEGER, interval REAL NOT NULL, "
+    "next_run REAL NOT NULL, created_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_watches_next_run ON watches (next_run)",
+]
+
+class PriceHistory:
+    """SQLite store of price observations and the watchlist.
+
+    Observations are buffered and written with one executemany per batch,
+    either when ``batch_size`` rows are waiting or every ``flush_interval``
+    seconds from a background thread, so scrapes never wait on disk.
+    """
+
+    def __init__(self, db_path, batch_size=500, flush_interval=2.0):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")  # Readers don't block the batch writer
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._lock = threading.Lock()  # Guards the connection
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="price-history-flush", daemon=True)
+        self._flusher.start()
+
+    def record(self, query, products, ts=None):
+        """Queue one observation per priced product with a link; returns how many were queued."""
+        ts = ts or time.time()
+        query = normalize_query(query)
+        rows = [
+            (ts, query, product.get("source", ""), product["link"], product.get("title"), float(product["price"]))
+            for product in products
+            if product.get("link") not in (None, "N/A") and isinstance(product.get("price"), (int, float)) and product["price"] > 0
+        ]
+        with self._pending_lock:
+            self._pending.extend(rows)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+        return len(rows)
+
+    def flush(self):
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        with self._lock:
+            if self._db is None:
+                return 0
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT INTO price_observations (ts, query, source, link, title, price) VALUES (?, ?, ?, ?, ?, ?)", rows
+                    )
+            except sqlite3.Error as e:
+                self.logger.warning(f"Error writing {len(rows)} price observations: {str(e)}")
+                return 0
+        return len(rows)
+
+    def history(self, link=None, query=None, source=None, since=None, until=None, limit=1000):
+        """The latest ``limit`` observations for one product link, or for a query (optionally
+        one source), oldest first; narrow the window with ``until`` to page further back."""
+        where, params = self._filters(link, query, source, since, until)
+        rows = self._fetch(
+            f"SELECT ts, source, link, title, price FROM price_observations WHERE {where} ORDER BY ts DESC LIMIT ?",
+            params + [limit],
+        )
+        rows.reverse()
+        return rows
+
+    def stats(self, link=None, query=None, source=None, since=None, until=None):
+        """Observation count, min/max/average price and first/last timestamps over the window."""
+        where, params = self._filters(link, query, source, since, until)
+        row = self._fetch(
+            f"SELECT COUNT(*) AS observations, MIN(price) AS min_price, MAX(price) AS max_price, "
+            f"AVG(price) AS avg_price, MIN(ts) AS first_ts, MAX(ts) AS last_ts FROM price_observations WHERE {where}",
+            params,
+        )[0]
+        if row["avg_price"] is not None:
+            row["avg_price"] = round(row["avg_price"], 2)
+        return row
+
+    def drops(self, link=None, query=None, source=None, since=None, until=None, min_pct=5.0, limit=100):
+        """Price-drop events: a product observed at least ``min_pct`` percent cheaper than its
+        previous observation in the window, largest drops first."""
+        where, params = self._filters(link, query, source, since, until)
+        return self._fetch(
+            "SELECT ts, source, link, title, previous_price, price, "
+            "ROUND((previous_price - price) * 100.0 / previous_price, 1) AS drop_pct FROM ("
+            "SELECT ts, source, link, title, price, LAG(price) OVER (PARTITION BY link ORDER BY ts) AS previous_price "
+            f"FROM price_observations WHERE {where}) "
+            "WHERE previous_price > 0 AND price <= previous_price * (1 - ? / 100.0) "
+            "ORDER BY drop_pct DESC, ts DESC LIMIT ?",
+            params + [min_pct, limit],
+        )
+
+    def add_watch(self, query, source=None, link=None, interval=3600, result_limit=None):
+        now = time.time()
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO watches (query, source, link, result_limit, interval, next_run, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (query, source, link, result_limit, interval, now, now),
+            )
+        return self.get_watch(cursor.lastrowid)
+
+    def get_watch(self, watch_id):
+        rows = self._fetch("SELECT * FROM watches WHERE id = ?", [watch_id])
+        return rows[0] if rows else None
+
+    def watches(self):
+        return self._fetch("SELECT * FROM watches ORDER BY id", [])
+
+    def remove_watch(self, watch_id):
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM watches WHERE id = ?", (watch_id,)).rowcount > 0
+
+    def due_watches(self, now=None, limit=100):
+        return self._fetch("SELECT * FROM watches WHERE next_run <= ? ORDER BY next_run LIMIT ?", [now or time.time(), limit])
+
+    def reschedule(self, watch_id, next_run):
+        with self._lock, self._db:
+            self._db.execute("UPDATE watches SET next_run = ? WHERE id = ?", (next_run, watch_id))
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join(timeout=self.flush_interval + 1)
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _filters(self, link, query, source, since, until):
+        # Leading with link or query keeps every lookup on one of the indexes
+        if link:
+            where, params = ["link = ?"], [link]
+        elif query:
+            where, params = ["query = ?"], [normalize_query(query)]
+        else:
+            raise ValueError("link or query is required")
+        if source:
+            where.append("source = ?")
+            params.append(source)
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts <= ?")
+            params.append(until)
+        return " AND ".join(where), params
+
+    def _fetch(self, sql, params):
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
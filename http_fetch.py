@@ -0,0 +1,84 @@
+import logging
+import threading
+from urllib.parse import urljoin
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from lxml import html as lxml_html
+    from lxml.cssselect import CSSSelector
+    AVAILABLE = True
+except ImportError:  # The fast path is optional; scrapers fall back to Selenium without it
+    AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+_session = None
+_session_lock = threading.Lock()
+_selector_cache = {}
+
+def get_session():
+    """Return the process-wide keep-alive HTTP session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=0)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session.headers.update(HEADERS)
+        return _session
+
+def fetch(url, timeout=10):
+    """GET a page over the pooled session and return (final url, html)."""
+    response = get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.url, response.text
+
+def close():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def compiled(selector):
+    """CSS selectors are compiled to XPath once and reused across pages."""
+    compiled_selector = _selector_cache.get(selector)
+    if compiled_selector is None:
+        compiled_selector = _selector_cache[selector] = CSSSelector(selector)
+    return compiled_selector
+
+def extract_cards(page_html, base_url, card_selector, fields, limit=None):
+    """Parse server-rendered HTML into the same raw card payloads as the in-browser extractor."""
+    document = lxml_html.fromstring(page_html)
+    cards = compiled(card_selector)(document)
+    if limit is not None:
+        cards = cards[:limit]
+    return [_read_fields(card, base_url, fields) for card in cards]
+
+def _read_fields(card, base_url, fields):
+    out = {}
+    for name, (selectors, kind) in fields.items():
+        out[name] = None
+        for selector in selectors:
+            matches = compiled(selector)(card)
+            if not matches:
+                continue
+            element = matches[0]
+            if kind in ("text", "textContent"):
+                out[name] = " ".join(element.text_content().split())
+            elif kind in ("href", "src"):
+                value = element.get(kind)
+                out[name] = urljoin(base_url, value) if value else ""
+            else:
+                out[name] = element.get(kind)
+            break
+    return out
@@ -0,0 +1,269 @@
+"""Local scrape worker tier.
+
+Scrape jobs (one per source) go onto a multiprocessing queue served by a
+fixed number of worker processes, each owning its own DriverPool. The web
+process only waits on futures, so a burst of searches no longer ties up
+request threads in Selenium calls, and the browser tier is sized
+independently with PRICE_SCOUT_WORKERS. When more than max_depth jobs are
+outstanding, submit() raises QueueFull instead of piling up work.
+
+A worker process that dies fails the job it was running and is replaced,
+and a job that hasn't finished within job_timeout seconds of being queued
+is failed, so lost jobs never hold queue slots (or the searches waiting on
+them) forever.
+"""
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Scrape queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+def _worker_main(worker_id, jobs, results, pool_size, current_job):
+    # Imported here so the parent never needs Selenium loaded to run the queue
+    import archive
+    import search
+    from driver_pool import DriverPool
+    from scraper import create_chrome_driver
+
+    pool = DriverPool(create_chrome_driver, size=pool_size, origins=search.site_origins())
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            job_id, source, query, ready_timeout, limit = job
+            # Shared memory rather than a message, so the parent still knows the job if this process dies
+            current_job.value = job_id
+            results.put(("start", worker_id, job_id, None))
+            try:
+                results.put(("done", worker_id, job_id, search.run_source(source, query, pool, ready_timeout, limit)))
+            except Exception as e:
+                results.put(("error", worker_id, job_id, f"{type(e).__name__}: {str(e)}"))
+            current_job.value = 0
+    finally:
+        pool.shutdown()
+        archive.close()  # Flush pages still waiting to be archived
+
+class ScrapeQueue:
+    def __init__(self, workers=2, max_depth=32, pool_size=2, job_timeout=60.0, check_interval=1.0):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.pool_size = pool_size
+        self.job_timeout = job_timeout
+        self.check_interval = check_interval
+        self._context = multiprocessing.get_context("spawn")  # Forking a threaded server is unsafe
+        self._jobs = None
+        self._results = None
+        self._processes = {}  # worker_id -> (process, shared id of the job it is running, 0 when idle)
+        self._futures = {}
+        self._deadlines = {}  # job_id -> monotonic time by which it must have finished
+        self._running = {}  # worker_id -> job_id it last reported starting
+        self._ids = itertools.count(1)
+        self._worker_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._busy_since = {}
+        self._busy_seconds = 0.0
+        self._counts = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "restarted": 0}
+        self._job_seconds = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._processes:
+                return
+            self._jobs = self._context.Queue()
+            self._results = self._context.Queue()
+            for _ in range(self.workers):
+                self._spawn()
+            self._started_at = time.monotonic()
+        threading.Thread(target=self._collect, name="scrape-queue-results", daemon=True).start()
+        logger.info(f"Started {self.workers} scrape workers (queue depth {self.max_depth})")
+
+    def depth(self):
+        with self._lock:
+            return len(self._futures)
+
+    def free_slots(self):
+        return max(0, self.max_depth - self.depth())
+
+    def retry_after(self):
+        """Seconds until the backlog should have drained, from the average job time."""
+        with self._lock:
+            finished = self._counts["completed"] + self._counts["failed"]
+            average = self._job_seconds / finished if finished else 10.0
+            depth = len(self._futures)
+        return max(1, math.ceil(average * depth / max(1, self.workers)))
+
+    def reject(self):
+        with self._lock:
+            self._counts["rejected"] += 1
+        return QueueFull(self.retry_after())
+
+    def submit(self, source, query, ready_timeout=None, limit=None):
+        """Queue a scrape of one source; the future resolves to run_source's (products, status)."""
+        if not self._processes:
+            self.start()
+        future = Future()
+        with self._lock:
+            if len(self._futures) >= self.max_depth:
+                full = True
+            else:
+                full = False
+                job_id = next(self._ids)
+                self._futures[job_id] = future
+                self._deadlines[job_id] = time.monotonic() + self.job_timeout
+        if full:
+            raise self.reject()
+        future.set_running_or_notify_cancel()
+        self._jobs.put((job_id, source, query, ready_timeout, limit))
+        return future
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            uptime = now - self._started_at if self._started_at else 0.0
+            busy = self._busy_seconds + sum(now - since for since in self._busy_since.values())
+            return dict(
+                self._counts,
+                workers=self.workers,
+                alive=sum(1 for process, _ in self._processes.values() if process.is_alive()),
+                depth=len(self._futures),
+                running=len(self._busy_since),
+                max_depth=self.max_depth,
+                utilization=round(busy / (uptime * self.workers), 3) if uptime and self.workers else 0.0,
+            )
+
+    def shutdown(self, timeout=5):
+        with self._lock:
+            processes, self._processes = [process for process, _ in self._processes.values()], {}
+        if not processes:
+            return
+        for _ in processes:
+            self._jobs.put(None)
+        for process in processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        with self._lock:
+            futures, self._futures = self._futures, {}
+            self._deadlines.clear()
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Scrape queue shut down"))
+
+    def _spawn(self):
+        # Called with the lock held (or before the collector starts)
+        worker_id = next(self._worker_ids)
+        current_job = self._context.Value("q", 0, lock=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_id, self._jobs, self._results, self.pool_size, current_job),
+            name=f"scrape-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[worker_id] = (process, current_job)
+
+    def _collect(self):
+        next_check = time.monotonic() + self.check_interval
+        while True:
+            try:
+                message = self._results.get(timeout=self.check_interval)
+            except queue.Empty:
+                message = False
+            if message is None:
+                break
+            if message:
+                self._handle(message)
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + self.check_interval
+
+    def _handle(self, message):
+        kind, worker_id, job_id, payload = message
+        now = time.monotonic()
+        with self._lock:
+            if kind == "start":
+                if worker_id in self._processes:
+                    self._busy_since[worker_id] = now
+                    self._running[worker_id] = job_id
+                    return
+                # Sent just before the worker died, after the watchdog replaced it
+                future = self._futures.pop(job_id, None)
+                self._deadlines.pop(job_id, None)
+                payload = "Scrape worker exited"
+                if future is not None:
+                    self._counts["failed"] += 1
+            else:
+                started = self._busy_since.pop(worker_id, now)
+                self._running.pop(worker_id, None)
+                self._busy_seconds += now - started
+                self._job_seconds += now - started
+                future = self._futures.pop(job_id, None)
+                self._deadlines.pop(job_id, None)
+                if future is not None:
+                    self._counts["completed" if kind == "done" else "failed"] += 1
+        if future is None:
+            return  # Already failed by the watchdog
+        if kind == "done":
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def _check_workers(self):
+        """Fail the jobs of dead workers and replace them, and fail jobs past their deadline."""
+        now = time.monotonic()
+        failed = []
+        with self._lock:
+            for worker_id, (process, current_job) in list(self._processes.items()):
+                if process.is_alive():
+                    continue
+                del self._processes[worker_id]
+                job_id = current_job.value or self._running.get(worker_id)
+                self._running.pop(worker_id, None)
+                started = self._busy_since.pop(worker_id, None)
+                if started is not None:
+                    self._busy_seconds += now - started
+                    self._job_seconds += now - started
+                future = self._futures.pop(job_id, None)
+                self._deadlines.pop(job_id, None)
+                if future is not None:
+                    self._counts["failed"] += 1
+                    failed.append((future, RuntimeError(f"Scrape worker exited with code {process.exitcode}")))
+                logger.warning("Scrape worker %s exited with code %s, starting a replacement", worker_id, process.exitcode)
+                self._counts["restarted"] += 1
+                self._spawn()
+            for job_id, deadline in list(self._deadlines.items()):
+                if deadline > now:
+                    continue
+                del self._deadlines[job_id]
+                future = self._futures.pop(job_id, None)
+                if future is not None:
+                    self._counts["timed_out"] += 1
+                    failed.append((future, TimeoutError(f"Scrape job missed its {self.job_timeout:g}s deadline")))
+        for future, error in failed:
+            future.set_exception(error)
+
+def from_environment():
+    """The configured ScrapeQueue, or None to scrape inline (PRICE_SCOUT_WORKERS=0)."""
+    workers = int(os.environ.get("PRICE_SCOUT_WORKERS", "0"))
+    if workers <= 0:
+        return None
+    return ScrapeQueue(
+        workers=workers,
+        max_depth=int(os.environ.get("PRICE_SCOUT_QUEUE_DEPTH", "32")),
+        pool_size=int(os.environ.get("PRICE_SCOUT_WORKER_POOL_SIZE", "2")),
+        job_timeout=float(os.environ.get("PRICE_SCOUT_JOB_TIMEOUT", "60")),
+    )
@@ -0,0 +1,218 @@
+"""Cross-store product matching.
+
+Titles from each store are normalized into canonical attributes (brand,
+model tokens, storage, RAM, color), indexed by model token, and listings
+whose IDF-weighted token vectors are similar enough (and whose attributes
+don't conflict) are grouped as one product. Scoring walks the inverted
+index, so each listing is only compared with listings that share a token
+rather than with every other listing.
+"""
+import math
+import re
+from collections import defaultdict
+
+# First-word brands, plus product lines whose brand is usually left implicit
+BRANDS = {
+    "apple", "samsung", "oneplus", "xiaomi", "realme", "vivo", "oppo", "iqoo", "motorola",
+    "google", "nothing", "nokia", "honor", "infinix", "tecno", "lava", "sony", "asus", "poco", "redmi",
+}
+BRAND_ALIASES = {"iphone": "apple", "galaxy": "samsung", "pixel": "google", "moto": "motorola", "mi": "xiaomi",
+                 "redmi": "xiaomi", "poco": "xiaomi"}
+
+COLOR_WORDS = {
+    "black", "white", "blue", "green", "red", "yellow", "purple", "pink", "gold", "silver", "grey", "gray",
+    "titanium", "midnight", "starlight", "graphite", "violet", "orange", "cream", "lavender", "mint", "teal",
+    "bronze", "copper", "beige", "aqua", "navy", "natural", "desert", "ultramarine", "onyx", "obsidian", "porcelain",
+}
+
+# Tokens that distinguish otherwise identical model names; listings must agree on them exactly
+VARIANT_WORDS = {"pro", "max", "plus", "ultra", "mini", "lite", "fe", "neo", "prime", "edge", "fold", "flip"}
+
+NOISE_WORDS = {"smartphone", "mobile", "phone", "with", "and", "the", "new", "dual", "sim", "5g", "4g", "lte",
+               "unlocked", "renewed", "refurbished", "storage", "ram", "rom", "gb", "tb", "unknown", "n", "a"}
+
+_MEMORY_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(gb|tb)\b(\s*(?:ram|rom|storage))?", re.IGNORECASE)
+_PAREN_RE = re.compile(r"\(([^)]*)\)")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def _gigabytes(amount, unit):
+    value = float(amount) * (1024 if unit.lower() == "tb" else 1)
+    return int(value) if value.is_integer() else value
+
+def _memory(title):
+    """Return (storage_gb, ram_gb) from mentions like "8GB RAM, 256GB" or "(Black, 128 GB)"."""
+    ram = storage = None
+    unlabeled = []
+    for amount, unit, label in _MEMORY_RE.findall(title):
+        size = _gigabytes(amount, unit)
+        label = label.strip().lower()
+        if label == "ram":
+            ram = size
+        elif label in ("rom", "storage"):
+            storage = size
+        else:
+            unlabeled.append(size)
+    if unlabeled:
+        if storage is None:
+            storage = max(unlabeled)
+            unlabeled.remove(storage)
+        if ram is None and unlabeled and min(unlabeled) <= 24:
+            ram = min(unlabeled)
+    return storage, ram
+
+def _color(title):
+    """The color named inside the title's parentheses, e.g. "Natural Titanium"."""
+    for group in _PAREN_RE.findall(title):
+        for part in re.split(r"[,|/]", group):
+            words = _TOKEN_RE.findall(part.lower())
+            if words and any(word in COLOR_WORDS for word in words) and not _MEMORY_RE.search(part):
+                return " ".join(words)
+    return None
+
+def normalize_title(title):
+    """Canonical attributes of a listing title.
+
+    Returns a dict with brand, model (ordered tokens, parentheses, memory and
+    color stripped), storage_gb, ram_gb and color; unknown values are None.
+    """
+    storage, ram = _memory(title or "")
+    color = _color(title or "")
+    base = _PAREN_RE.sub(" ", (title or "").lower())
+    base = _MEMORY_RE.sub(" ", base)
+    tokens = [token for token in _TOKEN_RE.findall(base) if token not in NOISE_WORDS]
+
+    brand = None
+    if tokens and tokens[0] in BRANDS:
+        brand = BRAND_ALIASES.get(tokens[0], tokens[0])
+        if tokens[0] not in BRAND_ALIASES:  # Keep sub-brands like "redmi" as model tokens
+            tokens = tokens[1:]
+    if brand is None:
+        brand = next((BRAND_ALIASES[token] for token in tokens if token in BRAND_ALIASES), None)
+    # A trailing color left outside the parentheses isn't part of the model
+    color_words = set(color.split()) if color else set()
+    trailing = []
+    while tokens and (tokens[-1] in color_words or (color is None and tokens[-1] in COLOR_WORDS)):
+        trailing.insert(0, tokens.pop())
+    if color is None and trailing:
+        color = " ".join(trailing)
+
+    return {"brand": brand, "model": tokens, "storage_gb": storage, "ram_gb": ram, "color": color}
+
+def _compatible(a, b):
+    """Attributes known on both sides must agree; model variants (pro, max, ...) and numbers too."""
+    for field in ("brand", "storage_gb", "ram_gb", "color"):
+        if a[field] is not None and b[field] is not None and a[field] != b[field]:
+            return False
+    return _distinguishing(a["model"]) == _distinguishing(b["model"])
+
+def _distinguishing(tokens):
+    return frozenset(token for token in tokens if token in VARIANT_WORDS or any(c.isdigit() for c in token))
+
+def _merge_attributes(a, b):
+    merged = dict(a)
+    for field in ("brand", "storage_gb", "ram_gb", "color"):
+        if merged[field] is None:
+            merged[field] = b[field]
+    if len(b["model"]) > len(merged["model"]):
+        merged["model"] = b["model"]
+    return merged
+
+class ProductMatcher:
+    """Groups listings whose normalized titles refer to the same product.
+
+    Each listing becomes an L2-normalized TF-IDF vector over its model tokens
+    (plus brand). Candidate pairs come from the inverted index, their cosine
+    similarity is accumulated posting by posting, and pairs scoring at least
+    ``threshold`` with compatible attributes are merged (union-find, with the
+    merged group's attributes re-checked so chains can't join conflicting
+    variants).
+    """
+
+    def __init__(self, threshold=0.75):
+        self.threshold = threshold
+
+    def group(self, products):
+        """Return comparison groups, largest first, each with its cheapest offer and price spread."""
+        attributes = [normalize_title(product.get("title", "")) for product in products]
+        vectors = self._vectors(attributes)
+        postings = defaultdict(list)
+        for index, vector in enumerate(vectors):
+            for token, weight in vector.items():
+                postings[token].append((index, weight))
+
+        parent = list(range(len(products)))
+        merged = list(attributes)
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        for index, vector in enumerate(vectors):
+            scores = defaultdict(float)
+            for token, weight in vector.items():
+                for other, other_weight in postings[token]:
+                    if other > index:
+                        scores[other] += weight * other_weight
+            for other, score in sorted(scores.items(), key=lambda item: -item[1]):
+                if score < self.threshold:
+                    break
+                root, other_root = find(index), find(other)
+                if root == other_root or not _compatible(merged[root], merged[other_root]):
+                    continue
+                parent[other_root] = root
+                merged[root] = _merge_attributes(merged[root], merged[other_root])
+
+        members = defaultdict(list)
+        for index in range(len(products)):
+            members[find(index)].append(index)
+        groups = [self._group(merged[root], [products[index] for index in indexes]) for root, indexes in members.items()]
+        groups.sort(key=lambda group: (-len(group["offers"]), group["price_min"] if group["price_min"] is not None else math.inf))
+        return groups
+
+    @staticmethod
+    def _vectors(attributes):
+        documents = [set(attrs["model"]) | ({f"brand:{attrs['brand']}"} if attrs["brand"] else set()) for attrs in attributes]
+        document_frequency = defaultdict(int)
+        for tokens in documents:
+            for token in tokens:
+                document_frequency[token] += 1
+        total = len(documents)
+        vectors = []
+        for tokens in documents:
+            weights = {token: math.log((1 + total) / (1 + document_frequency[token])) + 1 for token in tokens}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            vectors.append({token: weight / norm for token, weight in weights.items()})
+        return vectors
+
+    @staticmethod
+    def _group(attributes, offers):
+        # Unparseable prices come back as 0.0 and would always look cheapest
+        priced, unpriced = [], []
+        for offer in offers:
+            (priced if isinstance(offer.get("price"), (int, float)) and offer["price"] > 0 else unpriced).append(offer)
+        priced.sort(key=lambda offer: offer["price"])
+        price_min = priced[0]["price"] if priced else None
+        price_max = priced[-1]["price"] if priced else None
+        return {
+            "brand": attributes["brand"],
+            "model": " ".join(attributes["model"]),
+            "storage_gb": attributes["storage_gb"],
+            "ram_gb": attributes["ram_gb"],
+            "color": attributes["color"],
+            "sources": sorted({offer.get("source") for offer in offers if offer.get("source")}),
+            "offers": priced + unpriced,
+            "cheapest": priced[0] if priced else None,
+            "price_min": price_min,
+            "price_max": price_max,
+            "price_spread": round(price_max - price_min, 2) if priced else None,
+            "price_spread_pct": round((price_max - price_min) / price_min * 100, 1) if priced else None,
+        }
+
+_default_matcher = ProductMatcher()
+
+def group_products(products, threshold=None):
+    """Group a flat product list into cross-store comparison groups."""
+    matcher = _default_matcher if threshold is None else ProductMatcher(threshold)
+    return matcher.group(products)
@@ -0,0 +1,151 @@
+"""Minimal in-process metrics rendered in the Prometheus text format.
+
+Counters and histograms are updated on the search path; gauges are read
+from callbacks (pool, queue, breakers) only when /metrics is scraped.
+"""
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class _Metric:
+    TYPE = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self._samples())
+        return lines
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in sorted(values.items())]
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        lines = []
+        names = self.labels + ("le",)
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, key + ('+Inf',))} {values[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {round(values[-2], 6)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {values[-1]}")
+        return lines
+
+class Gauge(_Metric):
+    """Read at render time from ``callback``, which returns {label values tuple: value}."""
+    TYPE = "gauge"
+
+    def __init__(self, name, help_text, labels=(), callback=None):
+        super().__init__(name, help_text, labels)
+        self.callback = callback
+
+    def _samples(self):
+        try:
+            values = self.callback() if self.callback else {}
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in sorted(values.items())]
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, labels=(), callback=None):
+        return self.register(Gauge(name, help_text, labels, callback))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+SEARCH_SECONDS = REGISTRY.histogram(
+    "price_scout_search_seconds", "Wall time of a search request", ["endpoint"])
+SOURCE_RESULTS = REGISTRY.counter(
+    "price_scout_source_results_total", "Per-source search outcomes (ok, empty, timeout, error, skipped)", ["source", "status"])
+SOURCE_SECONDS = REGISTRY.histogram(
+    "price_scout_source_seconds", "Time to scrape one source, cache misses only", ["source", "path"])
+STAGE_SECONDS = REGISTRY.histogram(
+    "price_scout_stage_seconds", "Time spent per scrape stage", ["source", "stage"])
+CACHE_LOOKUPS = REGISTRY.counter(
+    "price_scout_cache_lookups_total", "Result cache lookups by outcome (hit, stale, miss)", ["source", "result"])
+
+def server_timing(statuses, total_ms=None):
+    """Build a Server-Timing header value from per-source statuses."""
+    entries = []
+    if total_ms is not None:
+        entries.append(f"total;dur={total_ms}")
+    for source, status in statuses.items():
+        name = source.lower()
+        entries.append(f'{name};dur={status.get("elapsed_ms", 0)};desc="{source} {status.get("status", "")}"')
+        for stage, ms in status.get("timings_ms", {}).items():
+            entries.append(f"{name}-{stage};dur={ms}")
+    return ", ".join(entries)
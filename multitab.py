@@ -0,0 +1,95 @@
+"""Scrape several sites in separate tabs of one browser.
+
+In the default per-site mode each source leases its own Chrome, so one
+search holds up to three browser process trees. In multi-tab mode
+(PRICE_SCOUT_BROWSER_MODE=multitab) a search leases a single driver, opens
+one tab per source that needs Selenium, starts all navigations without
+waiting, then polls the tabs round-robin and extracts each one as soon as
+its cards are ready. Pages load concurrently inside the one browser, so a
+search costs roughly one browser's memory.
+
+Compare both models on the same hardware with the offline load test, forcing
+every source onto the browser path so the HTTP fast path doesn't mask the
+difference:
+
+    export PRICE_SCOUT_FLIPKART_FETCH=selenium PRICE_SCOUT_AMAZON_FETCH=selenium
+    python -m bench.run_bench load --browser-mode per_site --clients 4 --unique-queries
+    python -m bench.run_bench load --browser-mode multitab --clients 4 --unique-queries
+
+The report's peak_rss_mb (server plus browser children, with psutil) and
+throughput_rps are the numbers to compare.
+
+PRICE_SCOUT_NETWORK_STATS has no effect here: all tabs write to the driver's
+one performance log, so per-source request and byte counts (scrape_info's
+"network", /api/network-stats) are only reported in per-site mode.
+"""
+import logging
+import time
+from selenium.common.exceptions import TimeoutException
+
+from scraper import POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class _Tab:
+    def __init__(self, scraper, handle):
+        self.scraper = scraper
+        self.handle = handle
+        self.condition = scraper.ready_condition()
+        self.started = time.perf_counter()
+        self.deadline = time.monotonic() + scraper.ready_timeout
+
+def scrape_in_tabs(driver, scrapers, query, on_result):
+    """Run each scraper's Selenium path in its own tab of ``driver``.
+
+    ``on_result(scraper, products)`` is called once per scraper, as soon as
+    that tab finishes, so callers can publish results incrementally. As in
+    BaseScraper.scrape_selenium, a tab that fails or times out yields [].
+    Scrapers share the driver for the duration of the call only.
+    """
+    tabs = []
+    for index, scraper in enumerate(scrapers):
+        try:
+            if index > 0:
+                driver.switch_to.new_window("tab")
+            scraper.driver = driver
+            scraper.use_selenium()
+            scraper.apply_block_profile()
+            search_url = scraper.search_url(query)
+            logger.info("Opening %s tab for query: %s, URL: %s", scraper.SOURCE, query, search_url)
+            with scraper.stage("navigate"):
+                # Returns immediately with page_load_strategy "none", so every tab loads in parallel
+                driver.get(search_url)
+            tabs.append(_Tab(scraper, driver.current_window_handle))
+        except Exception as e:
+            logger.error("Error scraping %s: %s", scraper.SOURCE, e)
+            scraper.error = f"{type(e).__name__}: {str(e)}"
+            _finish(scraper, on_result, [])
+
+    while tabs:
+        for tab in list(tabs):
+            scraper = tab.scraper
+            try:
+                driver.switch_to.window(tab.handle)
+                if not tab.condition(driver):
+                    if time.monotonic() < tab.deadline:
+                        continue
+                    raise TimeoutException(f"{scraper.SOURCE} cards not ready within {scraper.ready_timeout}s")
+                scraper.timings["ready"] = round((time.perf_counter() - tab.started) * 1000, 1)
+                products = scraper.read_products(query)
+                scraper.read_more_pages(query, products)
+                _finish(scraper, on_result, products)
+            except Exception as e:
+                logger.error("Error scraping %s: %s", scraper.SOURCE, e)
+                scraper.error = f"{type(e).__name__}: {str(e)}"
+                _finish(scraper, on_result, [])
+            tabs.remove(tab)
+        if tabs:
+            time.sleep(POLL_INTERVAL / max(1, len(tabs)))
+
+def _finish(scraper, on_result, products):
+    scraper.driver = None  # The caller owns the shared driver
+    try:
+        on_result(scraper, products)
+    except Exception as e:
+        logger.error("Error publishing %s result: %s", scraper.SOURCE, e)
@@ -0,0 +1,81 @@
+import json
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# URL patterns (Network.setBlockedURLs wildcard syntax) grouped by what they block.
+# Blocking image downloads does not affect the src/href attributes we extract.
+RESOURCE_PATTERNS = {
+    "images": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "fonts": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*"],
+    "stylesheets": ["*.css*"],
+    "trackers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*googlesyndication.com*", "*facebook.net*", "*connect.facebook.com*",
+        "*hotjar.com*", "*clarity.ms*", "*amazon-adsystem.com*", "*criteo.com*",
+        "*taboola.com*", "*moengage.com*", "*branch.io*", "*appsflyer.com*",
+    ],
+}
+
+# Profiles are lists of RESOURCE_PATTERNS groups. "aggressive" also drops CSS, which
+# can change innerText for pages that hide text with stylesheets.
+BLOCK_PROFILES = {
+    "none": [],
+    "light": ["fonts", "media", "trackers"],
+    "standard": ["images", "fonts", "media", "trackers"],
+    "aggressive": ["images", "fonts", "media", "stylesheets", "trackers"],
+}
+
+_totals = defaultdict(lambda: {"pages": 0, "requests": 0, "blocked": 0, "bytes": 0})
+_totals_lock = threading.Lock()
+
+def blocked_urls(profile):
+    if profile not in BLOCK_PROFILES:
+        raise ValueError(f"Unknown resource blocking profile: {profile}")
+    return [pattern for group in BLOCK_PROFILES[profile] for pattern in RESOURCE_PATTERNS[group]]
+
+def apply_profile(driver, profile):
+    """Install a blocking profile on the driver's current tab via CDP."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls(profile)})
+
+def clear_profile(driver):
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+
+def drain_network_log(driver):
+    """Summarize (and clear) the performance log: requests sent, requests blocked and bytes received.
+
+    Returns None when the driver was started without performance logging.
+    """
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return None
+    stats = {"requests": 0, "blocked": 0, "bytes": 0}
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method")
+        if method == "Network.requestWillBeSent":
+            stats["requests"] += 1
+        elif method == "Network.loadingFinished":
+            stats["bytes"] += int(message["params"].get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed" and message["params"].get("blockedReason"):
+            stats["blocked"] += 1
+    return stats
+
+def record(source, stats):
+    with _totals_lock:
+        totals = _totals[source]
+        totals["pages"] += 1
+        for key in ("requests", "blocked", "bytes"):
+            totals[key] += stats[key]
+
+def network_totals():
+    with _totals_lock:
+        return {source: dict(totals) for source, totals in _totals.items()}
@@ -0,0 +1,111 @@
+"""Server-side sorting, filtering and cursor pagination of search results.
+
+Pages are cut with keyset cursors: a cursor holds the sort key of the last
+product returned (plus a fingerprint of the query, sort and filters it
+belongs to). For price and rating sorts the key is the product's own
+values, so the next page starts right after that product even if the
+result set has been refreshed in between. The relevance sort has no such
+value and keys on the product's position in the result list, which a
+refresh can change; its cursors are only exact while the cached results
+they were cut from last.
+"""
+import base64
+import bisect
+import hashlib
+import json
+import math
+
+from cache import normalize_query
+
+# "rating" is best first, like the UI's "By Rating"; unknown prices/ratings always sort last
+SORTS = ("relevance", "price", "price_desc", "rating")
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _number(value):
+    return float(value) if _is_number(value) else None
+
+def _price(product):
+    price = _number(product.get("price"))
+    return price if price else None  # 0.0 means the price couldn't be parsed
+
+def _sort_key(sort, product, position):
+    if sort == "price":
+        primary = _price(product)
+        primary = math.inf if primary is None else primary
+    elif sort == "price_desc":
+        primary = _price(product)
+        primary = math.inf if primary is None else -primary
+    elif sort == "rating":
+        rating = _number(product.get("rating"))
+        primary = math.inf if rating is None else -rating
+    else:
+        primary = position
+    # Link, then title, then position make the order total, so cursors are unambiguous
+    return (primary, str(product.get("link", "")), str(product.get("title", "")), position)
+
+def _matches(product, min_price, max_price, min_rating, sources):
+    if sources and product.get("source") not in sources:
+        return False
+    if min_price is not None or max_price is not None:
+        price = _price(product)
+        if price is None or (min_price is not None and price < min_price) or (max_price is not None and price > max_price):
+            return False
+    if min_rating is not None:
+        rating = _number(product.get("rating"))
+        if rating is None or rating < min_rating:
+            return False
+    return True
+
+def filter_products(products, min_price=None, max_price=None, min_rating=None, sources=None):
+    """The products passing the filters, in their original order."""
+    return [product for product in products if _matches(product, min_price, max_price, min_rating, sources)]
+
+def fingerprint(query, sort, min_price=None, max_price=None, min_rating=None, sources=None):
+    params = [normalize_query(query or ""), sort, min_price, max_price, min_rating, sorted(sources or [])]
+    return hashlib.sha1(json.dumps(params).encode("utf-8")).hexdigest()[:12]
+
+def encode_cursor(scope, key):
+    payload = json.dumps({"f": scope, "k": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, scope):
+    """The sort key a cursor points after; raises ValueError if it is malformed or for another listing."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key = tuple(payload["k"])
+        found_scope = payload["f"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if found_scope != scope:
+        raise ValueError("Cursor belongs to a different query, sort or filter")
+    # Same shape as _sort_key, so it compares against the keys it is bisected into
+    if (len(key) != 4 or not _is_number(key[0]) or not isinstance(key[1], str) or not isinstance(key[2], str)
+            or not isinstance(key[3], int) or isinstance(key[3], bool)):
+        raise ValueError("Invalid cursor")
+    return key
+
+def select(products, query="", sort="relevance", min_price=None, max_price=None, min_rating=None, sources=None,
+           page_size=None, cursor=None):
+    """Filter and sort ``products`` and return one page.
+
+    Returns {"products", "total" (matches across all pages), "next_cursor"
+    (None on the last page)}. Without ``page_size`` every match is returned.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(SORTS)}")
+    scope = fingerprint(query, sort, min_price, max_price, min_rating, sources)
+    keyed = sorted(
+        ((_sort_key(sort, product, position), product)
+         for position, product in enumerate(products)
+         if _matches(product, min_price, max_price, min_rating, sources)),
+        key=lambda item: item[0],
+    )
+    start = 0
+    if cursor:
+        start = bisect.bisect_right([key for key, _ in keyed], decode_cursor(cursor, scope))
+    end = len(keyed) if page_size is None else start + page_size
+    page = keyed[start:end]
+    next_cursor = encode_cursor(scope, page[-1][0]) if page and end < len(keyed) else None
+    return {"products": [product for _, product in page], "total": len(keyed), "next_cursor": next_cursor}
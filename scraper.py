@@ -1,404 +1,733 @@
 import logging
+import math
+import os
+import threading
 import time
 import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-
-class CromaScraper:
-    def __init__(self):
+from selenium.common.exceptions import NoSuchElementException
+import archive
+import http_fetch
+import resource_blocking
+
+# How many scrapes each fetch path ("http" or "selenium") has served, per source
+_fetch_path_counts = Counter()
+_fetch_path_lock = threading.Lock()
+
+def record_fetch_path(source, path):
+    with _fetch_path_lock:
+        _fetch_path_counts[(source, path)] += 1
+
+def fetch_path_stats():
+    """Per-source counts of scrapes served by each fetch path, plus the HTTP hit rate."""
+    with _fetch_path_lock:
+        counts = dict(_fetch_path_counts)
+    stats = {}
+    for (source, path), count in counts.items():
+        stats.setdefault(source, {"http": 0, "selenium": 0})[path] = count
+    for source_stats in stats.values():
+        total = source_stats["http"] + source_stats["selenium"]
+        source_stats["http_hit_rate"] = round(source_stats["http"] / total, 3) if total else 0.0
+    return stats
+
+# Per-page request/byte counts from the performance log. Per-site browser mode only: in
+# multi-tab mode the tabs share one log, so it is discarded rather than attributed per source
+NETWORK_STATS = os.environ.get("PRICE_SCOUT_NETWORK_STATS", "0") == "1"
+
+def create_chrome_driver():
+    """Start a headless Chrome configured the way all scrapers expect."""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    chrome_options.add_argument("--enable-unsafe-swiftshader")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    # Navigation returns as soon as it starts, and no later command waits for a pending load:
+    # readiness is the card polling in _CardsReady, and tabs (multitab.py, read_more_pages)
+    # only load in parallel if switching between them doesn't block on the previous tab
+    chrome_options.page_load_strategy = "none"
+    if NETWORK_STATS:
+        # Lets scrapers count requests, blocked requests and bytes per page
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    service = Service('chromedriver.exe')
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+# Collects every product card's fields in one round trip. arguments: card selector,
+# field spec ({name: [[selector, ...], kind]}) and max number of cards (or null).
+# "text" mirrors WebElement.text, "href"/"src" read the resolved DOM property like
+# get_attribute() does, anything else is read as a plain attribute.
+EXTRACT_CARDS_SCRIPT = """
+const [cardSelector, fields, limit] = arguments;
+let cards = Array.from(document.querySelectorAll(cardSelector));
+if (limit !== null) cards = cards.slice(0, limit);
+return cards.map(card => {
+    const out = {};
+    for (const [name, [selectors, kind]] of Object.entries(fields)) {
+        out[name] = null;
+        for (const selector of selectors) {
+            const el = card.querySelector(selector);
+            if (!el) continue;
+            if (kind === 'text') out[name] = el.innerText;
+            else if (kind === 'textContent') out[name] = el.textContent;
+            else if (kind === 'href' || kind === 'src') out[name] = el[kind];
+            else out[name] = el.getAttribute(kind);
+            break;
+        }
+    }
+    return out;
+});
+"""
+
+# Counts product cards and, if more are needed, scrolls one viewport to trigger lazy
+# loading in the same round trip. arguments: card selector, cards needed.
+COUNT_CARDS_SCRIPT = """
+const [cardSelector, needed] = arguments;
+const count = document.querySelectorAll(cardSelector).length;
+if (count < needed) window.scrollBy(0, window.innerHeight);
+return count;
+"""
+
+# A navigated tab whose document has finished loading (a new tab starts out as a loaded about:blank)
+PAGE_LOADED_SCRIPT = "return document.readyState === 'complete' && location.href !== 'about:blank';"
+
+POLL_INTERVAL = 0.2
+
+# Result pages past the first are read concurrently, this many at a time per scrape
+# (HTTP requests on the fast path, browser tabs on the Selenium path)
+PAGE_WORKERS = int(os.environ.get("PRICE_SCOUT_PAGE_WORKERS", "4"))
+_page_executor = ThreadPoolExecutor(max_workers=PAGE_WORKERS * 2, thread_name_prefix="page")
+
+class _CardsReady:
+    """WebDriverWait condition: enough cards, or a non-empty card count that stopped changing.
+
+    With ``allow_empty``, a fully loaded page whose count stayed at zero is also
+    ready and returns 0 (so callers must test ``is not False``); result pages
+    past the last one are empty, and waiting them out would cost ready_timeout.
+    """
+
+    def __init__(self, card_selector, needed, quiet_period, allow_empty=False):
+        self.card_selector = card_selector
+        self.needed = needed
+        self.quiet_period = quiet_period
+        self.allow_empty = allow_empty
+        self.last_count = -1
+        self.changed_at = time.monotonic()
+
+    def __call__(self, driver):
+        count = driver.execute_script(COUNT_CARDS_SCRIPT, self.card_selector, self.needed)
+        if count >= self.needed:
+            return count
+        now = time.monotonic()
+        if count != self.last_count:
+            self.last_count = count
+            self.changed_at = now
+            return False
+        if now - self.changed_at < self.quiet_period:
+            return False
+        if count > 0 or (self.allow_empty and driver.execute_script(PAGE_LOADED_SCRIPT)):
+            return count
+        return False
+
+class BaseScraper:
+    SOURCE = None
+    BASE_URL = None
+    CARD_SELECTOR = None
+    # {field: ([css selectors tried in order], "text" | "textContent" | attribute name)}
+    FIELDS = {}
+    # Whether to keep scanning past the first max_products cards when some are skipped
+    SCAN_ALL_CARDS = False
+    # Readiness: extra cards to wait for beyond max_products, seconds to wait overall,
+    # and how long the card count must stay unchanged before a partial page counts as loaded
+    EXTRA_CARDS = 0
+    READY_TIMEOUT = 20
+    QUIET_PERIOD = 1.0
+    # "http_first" tries a plain HTTP fetch + lxml parse before starting a browser,
+    # "selenium" always renders the page
+    FETCH_STRATEGY = "http_first"
+    HTTP_TIMEOUT = 10
+    # Assets the browser skips downloading (see resource_blocking.BLOCK_PROFILES)
+    BLOCK_PROFILE = "standard"
+    # Query parameter selecting a results page (None: the site has one page that loads
+    # more on scroll), cards per page, and the most pages one scrape may read
+    PAGE_PARAM = "page"
+    PAGE_SIZE = 24
+    MAX_PAGES = 10
+
+    def __init__(self, pool=None, max_products=3, extraction_mode=None, ready_timeout=None, fetch_strategy=None, base_url=None):
         self.logger = logging.getLogger(__name__)
-        self.driver = None
-        self.setup_driver()
+        self.pool = pool  # Optional DriverPool; drivers are leased instead of started per scraper
+        self.max_products = max_products
+        # "batched" reads all cards with one execute_script call, "elements" uses find_element per field
+        self.extraction_mode = extraction_mode or os.environ.get("PRICE_SCOUT_EXTRACTION", "batched")
+        if ready_timeout is None:
+            ready_timeout = float(os.environ.get(f"PRICE_SCOUT_{self.SOURCE.upper()}_READY_TIMEOUT", self.READY_TIMEOUT))
+        self.ready_timeout = ready_timeout
+        self.fetch_strategy = fetch_strategy or os.environ.get(f"PRICE_SCOUT_{self.SOURCE.upper()}_FETCH", self.FETCH_STRATEGY)
+        self.fetch_path = None  # Which path served the last scrape
+        self.block_profile = os.environ.get(f"PRICE_SCOUT_{self.SOURCE.upper()}_BLOCK_PROFILE", self.BLOCK_PROFILE)
+        self.network_stats = None  # Requests/blocked/bytes for the last Selenium page, if enabled
+        self.timings = {}  # Milliseconds per stage of the last scrape
+        self.error = None  # Why the last Selenium scrape came back empty, if it failed
+        # Point searches at another host, e.g. the local fixture server in bench/
+        self.base_url = (base_url or self.configured_base_url()).rstrip("/")
+        self.driver = None  # Started (or leased) lazily, only when the Selenium path runs
+
+    @classmethod
+    def configured_base_url(cls):
+        return os.environ.get(f"PRICE_SCOUT_{cls.SOURCE.upper()}_BASE_URL", cls.BASE_URL).rstrip("/")
 
     def setup_driver(self):
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-            chrome_options.add_argument("--enable-unsafe-swiftshader")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-
-            service = Service('chromedriver.exe')
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.logger.info("ChromeDriver initialized successfully for Croma")
+            if self.pool:
+                self.driver = self.pool.acquire()
+                self.logger.info("ChromeDriver leased from pool for %s", self.SOURCE)
+            else:
+                self.driver = create_chrome_driver()
+                self.logger.info("ChromeDriver initialized successfully for %s", self.SOURCE)
         except Exception as e:
-            self.logger.error(f"Error initializing ChromeDriver for Croma: {str(e)}")
+            self.logger.error("Error initializing ChromeDriver for %s: %s", self.SOURCE, e)
             raise
 
-    def scrape(self, query):
-        try:
-            search_url = f"https://www.croma.com/searchB?q={query}%3Arelevance&text={query}"
-            self.logger.info(f"Scraping Croma for query: {query}, URL: {search_url}")
-            self.driver.get(search_url)
+    def search_url(self, query):
+        raise NotImplementedError
 
-            # Scroll to ensure dynamic content loads
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+    def page_url(self, query, page):
+        url = self.search_url(query)
+        return url if page == 1 else f"{url}&{self.PAGE_PARAM}={page}"
 
-            # Wait for the product listings to load
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.cp-product"))
-            )
+    def parse_card(self, card):
+        """Turn one raw card payload into a product dict, or None to skip it."""
+        raise NotImplementedError
 
-            products = []
-            product_elements = self.driver.find_elements(By.CSS_SELECTOR, "div.cp-product")
-            self.logger.info(f"Found {len(product_elements)} products on Croma")
+    @contextmanager
+    def stage(self, name):
+        """Add the wall time of the enclosed block to self.timings[name] (ms)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.timings[name] = round(self.timings.get(name, 0) + elapsed_ms, 1)
 
-            for product in product_elements[:3]:  # Process only the first 3 products
+    def scrape(self, query):
+        products = self.scrape_fast_path(query)
+        if products is not None:
+            return products
+
+        self.use_selenium()
+        if self.driver is None:
+            with self.stage("driver"):
+                self.setup_driver()
+        return self.scrape_selenium(query)
+
+    def scrape_fast_path(self, query):
+        """Try the HTTP path if this site allows it; returns products, or None if Selenium is needed."""
+        self.timings = {}
+        self.error = None
+        if self.fetch_strategy != "http_first" or not http_fetch.AVAILABLE:
+            return None
+        products = self.scrape_http(query)
+        if products is not None:
+            self.fetch_path = "http"
+            record_fetch_path(self.SOURCE, self.fetch_path)
+        return products
+
+    def use_selenium(self):
+        self.fetch_path = "selenium"
+        record_fetch_path(self.SOURCE, self.fetch_path)
+
+    def scrape_http(self, query):
+        """Fast path: returns products, or None when the served HTML has no product cards."""
+        search_url = self.search_url(query)
+        try:
+            self.logger.info("Fetching %s over HTTP for query: %s, URL: %s", self.SOURCE, query, search_url)
+            with self.stage("http_fetch"):
+                final_url, page_html = http_fetch.fetch(search_url, timeout=self.HTTP_TIMEOUT)
+            limit = None if self.SCAN_ALL_CARDS else self.max_products
+            with self.stage("extract"):
+                cards = http_fetch.extract_cards(page_html, final_url, self.CARD_SELECTOR, self.FIELDS, limit)
+            archive.capture(self.SOURCE, query, final_url, page_html, "http", len(cards))
+        except Exception as e:
+            self.logger.warning("HTTP fetch failed for %s, falling back to Selenium: %s", self.SOURCE, e)
+            return None
+        if not cards:
+            self.logger.info("No product cards in %s HTML, falling back to Selenium", self.SOURCE)
+            return None
+        self.logger.info("Found %d products on %s (HTTP)", len(cards), self.SOURCE)
+        with self.stage("parse"):
+            products = self.parse_cards(cards)
+        if self._page_wave(2, len(products)):
+            with self.stage("pages"):
+                self._read_more_pages_http(query, products)
+        return products
+
+    def _read_more_pages_http(self, query, products):
+        seen = {product["link"] for product in products}
+        page = 2
+        while self._page_wave(page, len(products)):
+            pages = range(page, page + self._page_wave(page, len(products)))
+            futures = [_page_executor.submit(self._fetch_page_cards, query, number) for number in pages]
+            added = 0
+            for number, future in zip(pages, futures):  # In page order, so ranking is kept
                 try:
-                    # Extract title and standardize format
-                    title_elem = product.find_element(By.CSS_SELECTOR, "h3.product-title a")
-                    title = title_elem.text.strip()
-                    title_match = re.match(
-                        r'(.+?)\s*\((\d+)GB(?:\s*RAM)?(?:,\s*(\d+)GB)?(?:,\s*(.+?))?\)',
-                        title,
-                        re.IGNORECASE
-                    )
-                    if title_match:
-                        model, capacity1, capacity2, color = title_match.groups(default="Unknown")
-                        capacity = capacity2 if capacity2 else capacity1
-                        color = color if color else "Unknown"
-                        title = f"{model} ({color}, {capacity} GB)"
-                    else:
-                        self.logger.warning(f"Unable to standardize title: {title}")
-
-                    # Extract price
-                    price_elem = product.find_element(By.CSS_SELECTOR, "span.amount")
-                    price_text = price_elem.text.replace("₹", "").replace(",", "").strip()
-                    price = float(price_text) if price_text else 0.0
-
-                    # Extract link
-                    link = title_elem.get_attribute("href")
-
-                    # Extract rating (try alternative selectors)
-                    try:
-                        rating_elem = product.find_element(By.CSS_SELECTOR, "span.rating-text")
-                        rating_text = rating_elem.text.strip()
-                    except NoSuchElementException:
-                        try:
-                            rating_elem = product.find_element(By.CSS_SELECTOR, "div.rating")
-                            rating_text = rating_elem.text.strip()
-                        except NoSuchElementException:
-                            rating_text = "N/A"
-                    rating = float(rating_text) if rating_text and re.match(r'^\d+\.?\d*$', rating_text) else "N/A"
-
-                    # Extract image URL
-                    try:
-                        image_elem = product.find_element(By.CSS_SELECTOR, "img")
-                        image_url = image_elem.get_attribute("src")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract image: {str(e)}")
-                        image_url = "N/A"
-
-                    stock = "In Stock"
-
-                    product_data = {
-                        "title": title,
-                        "price": price,
-                        "source": "Croma",
-                        "link": link,
-                        "stock": stock,
-                        "rating": rating,
-                        "image_url": image_url
-                    }
-                    products.append(product_data)
-                    self.logger.debug(f"Scraped product: {product_data}")
+                    cards = future.result()
                 except Exception as e:
-                    self.logger.warning(f"Error scraping Croma product: {str(e)}")
+                    self.logger.warning("Could not fetch %s page %d: %s", self.SOURCE, number, e)
                     continue
-
+                new_products = self.parse_cards(cards, self.max_products - len(products), seen)
+                products.extend(new_products)
+                added += len(new_products)
+            if not added:  # Ran out of results, or the site served page 1 again
+                break
+            page = pages.stop
+
+    def _fetch_page_cards(self, query, page):
+        final_url, page_html = http_fetch.fetch(self.page_url(query, page), timeout=self.HTTP_TIMEOUT)
+        limit = None if self.SCAN_ALL_CARDS else self.max_products
+        cards = http_fetch.extract_cards(page_html, final_url, self.CARD_SELECTOR, self.FIELDS, limit)
+        archive.capture(self.SOURCE, query, final_url, page_html, "http", len(cards))
+        return cards
+
+    def scrape_selenium(self, query):
+        try:
+            search_url = self.search_url(query)
+            self.logger.info("Scraping %s for query: %s, URL: %s", self.SOURCE, query, search_url)
+            self.apply_block_profile()
+            with self.stage("navigate"):
+                self.driver.get(search_url)
+
+            # Page load happens here: wait until enough product cards are present,
+            # scrolling only while more are needed
+            with self.stage("ready"):
+                self.wait_for_cards()
+
+            products = self.read_products(query)
+            self.read_more_pages(query, products)
             return products
         except Exception as e:
-            self.logger.error(f"Error scraping Croma: {str(e)}")
+            self.logger.error("Error scraping %s: %s", self.SOURCE, e)
+            self.error = f"{type(e).__name__}: {str(e)}"
             return []
         finally:
-            time.sleep(1)
+            self.collect_network_stats()
+
+    def read_products(self, query):
+        """Extract and parse the product cards on the current (ready) page."""
+        with self.stage("extract"):
+            cards = list(self.extract_cards())
+        self.archive_current_page(query, len(cards))
+        with self.stage("parse"):
+            return self.parse_cards(cards)
+
+    def read_more_pages(self, query, products):
+        """Add products from further result pages, loaded in parallel tabs of this driver,
+        until max_products is reached; links already seen are skipped.
+
+        A WebDriver error in a page tab is logged and stops paging, keeping the
+        products read so far, like a page the HTTP path fails to fetch.
+        """
+        if not self._page_wave(2, len(products)):
+            return
+        try:
+            self._read_more_pages_in_tabs(query, products)
+        except Exception as e:
+            self.logger.warning("Could not read more %s result pages: %s", self.SOURCE, e)
 
-    def close(self):
-        if self.driver:
+    def _read_more_pages_in_tabs(self, query, products):
+        with self.stage("pages"):
+            seen = {product["link"] for product in products}
+            origin = self.driver.current_window_handle
+            page = 2
             try:
-                self.driver.quit()
-                self.logger.info("ChromeDriver closed successfully for Croma")
-            except Exception as e:
-                self.logger.warning(f"Error closing ChromeDriver for Croma: {str(e)}")
+                while self._page_wave(page, len(products)):
+                    pages = range(page, page + self._page_wave(page, len(products)))
+                    added = 0
+                    for cards in self._load_pages_in_tabs(query, pages, origin):
+                        new_products = self.parse_cards(cards, self.max_products - len(products), seen)
+                        products.extend(new_products)
+                        added += len(new_products)
+                    if not added:
+                        break
+                    page = pages.stop
             finally:
-                self.driver = None
+                self.driver.switch_to.window(origin)
 
-class AmazonScraper:
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
-        self.driver = None
-        self.setup_driver()
-
-    def setup_driver(self):
+    def _load_pages_in_tabs(self, query, pages, origin):
+        """Open one tab per page, extract each once ready, close them; returns cards per page in order."""
+        tabs = {}
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-            chrome_options.add_argument("--enable-unsafe-swiftshader")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-
-            service = Service('chromedriver.exe')
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.logger.info("ChromeDriver initialized successfully for Amazon")
-        except Exception as e:
-            self.logger.error(f"Error initializing ChromeDriver for Amazon: {str(e)}")
-            raise
-
-    def scrape(self, query):
-        try:
-            search_url = f"https://www.amazon.in/s?k={query}"
-            self.logger.info(f"Scraping Amazon for query: {query}, URL: {search_url}")
-            self.driver.get(search_url)
-
-            # Scroll to ensure dynamic content loads
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-
-            # Wait for the product listings to load
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-component-type='s-search-result']"))
-            )
-
-            products = []
-            product_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[data-component-type='s-search-result']")
-            self.logger.info(f"Found {len(product_elements)} products on Amazon")
-
-            for product in product_elements:
-                if len(products) >= 3:  # Stop once we have 3 valid products
-                    break
-
+            for page in pages:
+                self.driver.switch_to.new_window("tab")
                 try:
-                    # Extract title with cleaning and formatting
-                    try:
-                        title_elem = product.find_element(By.CSS_SELECTOR, "h2.a-size-medium.a-color-base.a-text-normal span")
-                        raw_title = title_elem.text.strip()
-                        clean_title = re.sub(r'_\w+\s*\w+$', '', raw_title).strip()
-                        if not clean_title or clean_title == raw_title:
-                            h2_elem = product.find_element(By.CSS_SELECTOR, "h2.a-size-medium.a-color-base.a-text-normal")
-                            aria_label = h2_elem.get_attribute("aria-label")
-                            title = aria_label if aria_label else raw_title
-                        else:
-                            title = clean_title
-                        title_match = re.match(
-                            r'(.+?)\s*\((\d+)GB(?:,\s*(\w+))?\)',
-                            title,
-                            re.IGNORECASE
-                        )
-                        if title_match:
-                            model, capacity, color = title_match.groups(default="Unknown")
-                            title = f"{model} ({color}, {capacity} GB)"
-                        if "Sponsored Ad" in title or ("aria-label" in locals() and "Sponsored Ad" in aria_label):
-                            self.logger.debug("Skipping sponsored product")
-                            continue
-                        self.logger.debug(f"Extracted title: {title}")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract title: {str(e)}")
-                        title = "N/A"
+                    resource_blocking.apply_profile(self.driver, self.block_profile)  # Blocking is per tab
+                except Exception as e:
+                    self.logger.warning("Could not apply %s block profile to %s page tab: %s", self.block_profile, self.SOURCE, e)
+                self.driver.get(self.page_url(query, page))  # Returns immediately (page_load_strategy "none")
+                tabs[self.driver.current_window_handle] = _CardsReady(
+                    self.CARD_SELECTOR, self.PAGE_SIZE, self.QUIET_PERIOD, allow_empty=True
+                )
+            cards = {}
+            deadline = time.monotonic() + self.ready_timeout
+            while len(cards) < len(tabs) and time.monotonic() < deadline:
+                for handle, condition in tabs.items():
+                    if handle in cards:
                         continue
-
-                    # Extract price (with fallback)
-                    try:
-                        price_elem = product.find_element(By.CSS_SELECTOR, "span.a-price-whole")
-                        price_text = price_elem.text.replace(",", "").strip()
-                        if not price_text:
-                            price_elem = product.find_element(By.CSS_SELECTOR, "span.a-offscreen")
-                            price_text = price_elem.text.replace("₹", "").replace(",", "").strip()
-                        price = float(price_text) if price_text else 0.0
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract price: {str(e)}")
-                        price = 0.0
-
-                    # Extract link
-                    try:
-                        link_elem = product.find_element(By.CSS_SELECTOR, "a.a-link-normal.s-no-outline")
-                        link = link_elem.get_attribute("href")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract link: {str(e)}")
-                        link = "N/A"
-
-                    # Extract rating
-                    try:
-                        rating_elem = product.find_element(By.CSS_SELECTOR, "a.a-popover-trigger.a-declarative")
-                        aria_label = rating_elem.get_attribute("aria-label")
-                        rating_text = re.search(r'(\d+\.\d+)\s+out\s+of\s+5\s+stars', aria_label)
-                        rating = float(rating_text.group(1)) if rating_text else "N/A"
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract rating: {str(e)}")
-                        rating = "N/A"
-
-                    # Extract image URL
-                    try:
-                        image_elem = product.find_element(By.CSS_SELECTOR, "img.s-image")
-                        image_url = image_elem.get_attribute("src")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract image: {str(e)}")
-                        image_url = "N/A"
-
-                    stock = "In Stock"
-
-                    product_data = {
-                        "title": title,
-                        "price": price,
-                        "source": "Amazon",
-                        "link": link,
-                        "stock": stock,
-                        "rating": rating,
-                        "image_url": image_url
-                    }
-                    products.append(product_data)
-                    self.logger.debug(f"Scraped product: {product_data}")
+                    self.driver.switch_to.window(handle)
+                    if condition(self.driver) is not False:
+                        cards[handle] = list(self.extract_cards())
+                        self.archive_current_page(query, len(cards[handle]))
+                if len(cards) < len(tabs):
+                    time.sleep(POLL_INTERVAL / len(tabs))
+            if len(cards) < len(tabs):
+                self.logger.warning("%d %s result pages not ready within %ss", len(tabs) - len(cards), self.SOURCE, self.ready_timeout)
+            return [cards.get(handle, []) for handle in tabs]
+        finally:
+            for handle in tabs:
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
                 except Exception as e:
-                    self.logger.warning(f"Error scraping Amazon product: {str(e)}")
-                    continue
+                    self.logger.warning("Could not close %s page tab: %s", self.SOURCE, e)
+            self.driver.switch_to.window(origin)
 
-            return products
+    def archive_current_page(self, query, cards):
+        """Archive the rendered page if PRICE_SCOUT_ARCHIVE_DIR is set (page_source is a round trip)."""
+        if not archive.ARCHIVE_DIR:
+            return
+        try:
+            archive.capture(self.SOURCE, query, self.driver.current_url, self.driver.page_source, "selenium", cards)
         except Exception as e:
-            self.logger.error(f"Error scraping Amazon: {str(e)}")
-            return []
-        finally:
-            time.sleep(1)
+            self.logger.warning("Could not archive %s page: %s", self.SOURCE, e)
+
+    def _page_wave(self, page, have):
+        """How many pages, starting at ``page``, to read concurrently next; 0 when done."""
+        if not self.PAGE_PARAM or have >= self.max_products or page > self.MAX_PAGES:
+            return 0
+        pages_left = math.ceil((self.max_products - have) / self.PAGE_SIZE)
+        return min(PAGE_WORKERS, pages_left, self.MAX_PAGES - page + 1)
+
+    def apply_block_profile(self):
+        try:
+            resource_blocking.apply_profile(self.driver, self.block_profile)
+        except Exception as e:
+            self.logger.warning("Could not apply %s block profile for %s: %s", self.block_profile, self.SOURCE, e)
+        if NETWORK_STATS:
+            resource_blocking.drain_network_log(self.driver)  # Discard entries from earlier leases
+
+    def collect_network_stats(self):
+        if not NETWORK_STATS or self.driver is None:
+            return
+        self.network_stats = resource_blocking.drain_network_log(self.driver)
+        if self.network_stats is not None:
+            resource_blocking.record(self.SOURCE, self.network_stats)
+            self.logger.info("%s page network: %s", self.SOURCE, self.network_stats)
+
+    def scrape_info(self):
+        """How the last scrape was served, for per-source status reporting."""
+        info = {"path": self.fetch_path, "timings_ms": dict(self.timings), "limit": self.max_products}
+        if self.network_stats is not None:
+            info["network"] = self.network_stats
+        if self.error:
+            info["error"] = self.error
+        return info
+
+    def wait_for_cards(self):
+        """Block until the page has enough product cards, or the card count settles.
+
+        Returns the number of cards found; raises TimeoutException if none appear
+        within ready_timeout.
+        """
+        return WebDriverWait(self.driver, self.ready_timeout, poll_frequency=POLL_INTERVAL).until(self.ready_condition())
+
+    def ready_condition(self):
+        """A fresh readiness check; call it with the driver until it returns a card count."""
+        # Paginated sites only need a full first page; the rest comes from read_more_pages
+        needed = min(self.max_products, self.PAGE_SIZE) if self.PAGE_PARAM else self.max_products
+        return _CardsReady(self.CARD_SELECTOR, needed + self.EXTRA_CARDS, self.QUIET_PERIOD)
+
+    def extract_cards(self):
+        """Return raw field payloads for the product cards on the current page."""
+        limit = None if self.SCAN_ALL_CARDS else self.max_products
+        if self.extraction_mode == "elements":
+            return self._extract_cards_by_element(limit)
+        cards = self.driver.execute_script(EXTRACT_CARDS_SCRIPT, self.CARD_SELECTOR, self._field_spec(), limit)
+        self.logger.info("Found %d products on %s", len(cards), self.SOURCE)
+        return cards
+
+    def parse_cards(self, cards, limit=None, seen=None):
+        """Parse up to ``limit`` (default max_products) cards, skipping links in ``seen``,
+        which is updated with the links returned."""
+        limit = self.max_products if limit is None else limit
+        seen = set() if seen is None else seen
+        products = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)  # Checked once, not per product
+        for card in cards:
+            if len(products) >= limit:
+                break
+            try:
+                product_data = self.parse_card(card)
+            except Exception as e:
+                self.logger.warning("Error scraping %s product: %s", self.SOURCE, e)
+                continue
+            if product_data is None:
+                continue
+            link = product_data.get("link")
+            if link != "N/A":
+                if link in seen:
+                    continue
+                seen.add(link)
+            products.append(product_data)
+            if debug:
+                self.logger.debug("Scraped product: %s", product_data)
+        return products
 
     def close(self):
         if self.driver:
             try:
-                self.driver.quit()
-                self.logger.info("ChromeDriver closed successfully for Amazon")
+                if self.pool:
+                    self.pool.release(self.driver)
+                    self.logger.info("ChromeDriver returned to pool for %s", self.SOURCE)
+                else:
+                    self.driver.quit()
+                    self.logger.info("ChromeDriver closed successfully for %s", self.SOURCE)
             except Exception as e:
-                self.logger.warning(f"Error closing ChromeDriver for Amazon: {str(e)}")
+                self.logger.warning("Error closing ChromeDriver for %s: %s", self.SOURCE, e)
             finally:
                 self.driver = None
 
-class FlipkartScraper:
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
-        self.driver = None
-        self.setup_driver()
-
-    def setup_driver(self):
+    def _field_spec(self):
+        return {name: [list(selectors), kind] for name, (selectors, kind) in self.FIELDS.items()}
+
+    def _extract_cards_by_element(self, limit):
+        product_elements = self.driver.find_elements(By.CSS_SELECTOR, self.CARD_SELECTOR)
+        self.logger.info("Found %d products on %s", len(product_elements), self.SOURCE)
+        if limit is not None:
+            product_elements = product_elements[:limit]
+        # Lazy, so scanning stops as soon as parse_cards has enough products
+        return (self._read_fields(element) for element in product_elements)
+
+    def _read_fields(self, element):
+        card = {}
+        for name, (selectors, kind) in self.FIELDS.items():
+            card[name] = None
+            for selector in selectors:
+                try:
+                    field_elem = element.find_element(By.CSS_SELECTOR, selector)
+                except NoSuchElementException:
+                    continue
+                card[name] = field_elem.text if kind == "text" else field_elem.get_attribute(kind)
+                break
+        return card
+
+def parse_price(price_text):
+    price_text = (price_text or "").replace("₹", "").replace(",", "").strip()
+    return float(price_text) if price_text else 0.0
+
+class CromaScraper(BaseScraper):
+    SOURCE = "Croma"
+    BASE_URL = "https://www.croma.com"
+    CARD_SELECTOR = "div.cp-product"
+    FETCH_STRATEGY = "selenium"  # Search results are rendered client-side
+    PAGE_PARAM = None  # One page that loads more results as it is scrolled
+    FIELDS = {
+        "title": (["h3.product-title a"], "text"),
+        "link": (["h3.product-title a"], "href"),
+        "price": (["span.amount"], "text"),
+        "rating": (["span.rating-text", "div.rating"], "text"),
+        "image_url": (["img"], "src"),
+    }
+
+    def search_url(self, query):
+        return f"{self.base_url}/searchB?q={query}%3Arelevance&text={query}"
+
+    def parse_card(self, card):
+        # Extract title and standardize format
+        if card["title"] is None:
+            raise ValueError("product title not found")
+        title = card["title"].strip()
+        title_match = re.match(
+            r'(.+?)\s*\((\d+)GB(?:\s*RAM)?(?:,\s*(\d+)GB)?(?:,\s*(.+?))?\)',
+            title,
+            re.IGNORECASE
+        )
+        if title_match:
+            model, capacity1, capacity2, color = title_match.groups(default="Unknown")
+            capacity = capacity2 if capacity2 else capacity1
+            color = color if color else "Unknown"
+            title = f"{model} ({color}, {capacity} GB)"
+        else:
+            self.logger.warning("Unable to standardize title: %s", title)
+
+        # Extract price
+        if card["price"] is None:
+            raise ValueError("product price not found")
+        price = parse_price(card["price"])
+
+        # Extract rating (alternative selectors are tried in FIELDS)
+        rating_text = card["rating"].strip() if card["rating"] is not None else "N/A"
+        rating = float(rating_text) if rating_text and re.match(r'^\d+\.?\d*$', rating_text) else "N/A"
+
+        # Extract image URL
+        image_url = card["image_url"]
+        if image_url is None:
+            self.logger.warning("Failed to extract image: no img element")
+            image_url = "N/A"
+
+        return {
+            "title": title,
+            "price": price,
+            "source": "Croma",
+            "link": card["link"],
+            "stock": "In Stock",
+            "rating": rating,
+            "image_url": image_url
+        }
+
+class AmazonScraper(BaseScraper):
+    SOURCE = "Amazon"
+    BASE_URL = "https://www.amazon.in"
+    CARD_SELECTOR = "div[data-component-type='s-search-result']"
+    FIELDS = {
+        "title": (["h2.a-size-medium.a-color-base.a-text-normal span"], "text"),
+        "aria_label": (["h2.a-size-medium.a-color-base.a-text-normal"], "aria-label"),
+        "price_whole": (["span.a-price-whole"], "text"),
+        "price_offscreen": (["span.a-offscreen"], "textContent"),
+        "link": (["a.a-link-normal.s-no-outline"], "href"),
+        "rating_label": (["a.a-popover-trigger.a-declarative"], "aria-label"),
+        "image_url": (["img.s-image"], "src"),
+    }
+    SCAN_ALL_CARDS = True  # Sponsored results are skipped, so keep going until we have enough
+    EXTRA_CARDS = 2
+    PAGE_SIZE = 16
+
+    def search_url(self, query):
+        return f"{self.base_url}/s?k={query}"
+
+    def parse_card(self, card):
+        # Extract title with cleaning and formatting
+        if card["title"] is None:
+            self.logger.warning("Failed to extract title: title element not found")
+            return None
+        raw_title = card["title"].strip()
+        aria_label = ""
+        clean_title = re.sub(r'_\w+\s*\w+$', '', raw_title).strip()
+        if not clean_title or clean_title == raw_title:
+            aria_label = card["aria_label"] or ""
+            title = aria_label if aria_label else raw_title
+        else:
+            title = clean_title
+        title_match = re.match(
+            r'(.+?)\s*\((\d+)GB(?:,\s*(\w+))?\)',
+            title,
+            re.IGNORECASE
+        )
+        if title_match:
+            model, capacity, color = title_match.groups(default="Unknown")
+            title = f"{model} ({color}, {capacity} GB)"
+        if "Sponsored Ad" in title or "Sponsored Ad" in aria_label:
+            self.logger.debug("Skipping sponsored product")
+            return None
+        self.logger.debug("Extracted title: %s", title)
+
+        # Extract price (with fallback)
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-            chrome_options.add_argument("--enable-unsafe-swiftshader")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-
-            service = Service('chromedriver.exe')
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.logger.info("ChromeDriver initialized successfully for Flipkart")
+            if card["price_whole"] is None:
+                raise ValueError("price element not found")
+            price_text = card["price_whole"].replace(",", "").strip()
+            if not price_text:
+                if card["price_offscreen"] is None:
+                    raise ValueError("offscreen price element not found")
+                price_text = card["price_offscreen"]
+            price = parse_price(price_text)
         except Exception as e:
-            self.logger.error(f"Error initializing ChromeDriver for Flipkart: {str(e)}")
-            raise
-
-    def scrape(self, query):
+            self.logger.warning("Failed to extract price: %s", e)
+            price = 0.0
+
+        # Extract link
+        link = card["link"]
+        if link is None:
+            self.logger.warning("Failed to extract link: link element not found")
+            link = "N/A"
+
+        # Extract rating
+        rating_text = re.search(r'(\d+\.\d+)\s+out\s+of\s+5\s+stars', card["rating_label"] or "")
+        rating = float(rating_text.group(1)) if rating_text else "N/A"
+
+        # Extract image URL
+        image_url = card["image_url"]
+        if image_url is None:
+            self.logger.warning("Failed to extract image: image element not found")
+            image_url = "N/A"
+
+        return {
+            "title": title,
+            "price": price,
+            "source": "Amazon",
+            "link": link,
+            "stock": "In Stock",
+            "rating": rating,
+            "image_url": image_url
+        }
+
+class FlipkartScraper(BaseScraper):
+    SOURCE = "Flipkart"
+    BASE_URL = "https://www.flipkart.com"
+    CARD_SELECTOR = "div[data-id]"
+    FIELDS = {
+        "title": (["div.KzDlHZ"], "text"),
+        "price": (["div.Nx9bqj._4b5DiR"], "text"),
+        "link": (["a[href*='/p/']"], "href"),
+        "rating": (["div.XQDdHH"], "text"),
+        "image_url": (["img.DByuf4"], "src"),
+    }
+
+    def search_url(self, query):
+        return f"{self.base_url}/search?q={query}"
+
+    def parse_card(self, card):
+        # Extract title
+        title = card["title"].strip() if card["title"] is not None else "N/A"
+
+        # Extract price
         try:
-            search_url = f"https://www.flipkart.com/search?q={query}"
-            self.logger.info(f"Scraping Flipkart for query: {query}, URL: {search_url}")
-            self.driver.get(search_url)
-
-            # Scroll to ensure dynamic content loads
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-
-            # Wait for the product listings to load
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-id]"))
-            )
+            price = parse_price(card["price"])
+        except ValueError:
+            price = 0.0
 
-            products = []
-            product_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[data-id]")
-            self.logger.info(f"Found {len(product_elements)} products on Flipkart")
-
-            for product in product_elements[:3]:
-                try:
-                    # Extract title
-                    try:
-                        title_elem = product.find_element(By.CSS_SELECTOR, "div.KzDlHZ")
-                        title = title_elem.text.strip()
-                    except:
-                        title = "N/A"
-
-                    # Extract price
-                    try:
-                        price_elem = product.find_element(By.CSS_SELECTOR, "div.Nx9bqj._4b5DiR")
-                        price_text = price_elem.text.replace("₹", "").replace(",", "").strip()
-                        price = float(price_text) if price_text else 0.0
-                    except:
-                        price = 0.0
-
-                    # Extract link
-                    try:
-                        link_elem = product.find_element(By.CSS_SELECTOR, "a[href*='/p/']")
-                        link = link_elem.get_attribute("href")
-                    except:
-                        link = "N/A"
-
-                    # Extract rating
-                    try:
-                        rating_elem = product.find_element(By.CSS_SELECTOR, "div.XQDdHH")
-                        rating_text = rating_elem.text.strip()
-                        rating = float(rating_text) if rating_text else "N/A"
-                    except:
-                        rating = "N/A"
-
-                    # Extract image URL
-                    try:
-                        image_elem = product.find_element(By.CSS_SELECTOR, "img.DByuf4")
-                        image_url = image_elem.get_attribute("src")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract image: {str(e)}")
-                        image_url = "N/A"
-
-                    stock = "In Stock"
-
-                    product_data = {
-                        "title": title,
-                        "price": price,
-                        "source": "Flipkart",
-                        "link": link,
-                        "stock": stock,
-                        "rating": rating,
-                        "image_url": image_url
-                    }
-                    products.append(product_data)
-                    self.logger.debug(f"Scraped product: {product_data}")
-                except Exception as e:
-                    self.logger.warning(f"Error scraping Flipkart product: {str(e)}")
-                    continue
-
-            return products
-        except Exception as e:
-            self.logger.error(f"Error scraping Flipkart: {str(e)}")
-            return []
-        finally:
-            time.sleep(1)
+        # Extract link
+        link = card["link"] if card["link"] is not None else "N/A"
 
-    def close(self):
-        if self.driver:
-            try:
-                self.driver.quit()
-                self.logger.info("ChromeDriver closed successfully for Flipkart")
-            except Exception as e:
-                self.logger.warning(f"Error closing ChromeDriver for Flipkart: {str(e)}")
-            finally:
-                self.driver = None
\ No newline at end of file
+        # Extract rating
+        try:
+            rating_text = (card["rating"] or "").strip()
+            rating = float(rating_text) if rating_text else "N/A"
+        except ValueError:
+            rating = "N/A"
+
+        # Extract image URL
+        image_url = card["image_url"]
+        if image_url is None:
+            self.logger.warning("Failed to extract image: image element not found")
+            image_url = "N/A"
+
+        return {
+            "title": title,
+            "price": price,
+            "source": "Flipkart",
+            "link": link,
+            "stock": "In Stock",
+            "rating": rating,
+            "image_url": image_url
+        }
@@ -0,0 +1,393 @@
+import logging
+import os
+import time
+from urllib.parse import urlsplit
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import health
+import metrics
+from cache import ResultCache, normalize_query
+from jobqueue import QueueFull
+from multitab import scrape_in_tabs
+from scraper import FlipkartScraper, AmazonScraper, CromaScraper, create_chrome_driver
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Sources in the order their products are returned: Flipkart first, Amazon second, Croma last
+SCRAPERS = {
+    "Flipkart": FlipkartScraper,
+    "Amazon": AmazonScraper,
+    "Croma": CromaScraper,
+}
+
+def site_origins():
+    """Origins the scrapers browse, for clearing their storage between driver leases."""
+    return sorted({"{0.scheme}://{0.netloc}".format(urlsplit(cls.configured_base_url())) for cls in SCRAPERS.values()})
+
+# Overall time a search may take, and how much of it each source may use (seconds)
+SEARCH_DEADLINE = float(os.environ.get("PRICE_SCOUT_SEARCH_DEADLINE", "30"))
+SOURCE_BUDGETS = {
+    source: float(os.environ.get(f"PRICE_SCOUT_{source.upper()}_BUDGET", "25"))
+    for source in SCRAPERS
+}
+
+# Products per source when a search doesn't ask for a limit, and the largest limit allowed
+DEFAULT_LIMIT = int(os.environ.get("PRICE_SCOUT_DEFAULT_LIMIT", "3"))
+MAX_LIMIT = int(os.environ.get("PRICE_SCOUT_MAX_LIMIT", "200"))
+
+# "per_site" gives each source its own browser; "multitab" runs a search's sources
+# in tabs of one browser (see multitab.py)
+BROWSER_MODE = os.environ.get("PRICE_SCOUT_BROWSER_MODE", "per_site")
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("PRICE_SCOUT_SCRAPE_WORKERS", "6")),
+    thread_name_prefix="scrape",
+)
+
+# Rolling latency/failure tracking and circuit breakers per source
+health_registry = health.from_environment()
+
+# Optional out-of-process worker tier (see jobqueue.py); None scrapes in this process
+_job_queue = None
+
+# Optional history.PriceHistory that every completed scrape's prices are recorded in
+_price_history = None
+
+# Concurrent scrapes of the same (normalized query, source) share one in-flight future,
+# including stale-while-revalidate refreshes
+_inflight = SingleFlight()
+
+def is_relevant_product(product, query):
+    """Check if the product title is relevant to the query."""
+    if not product or 'title' not in product:
+        return False
+    title = product['title'].lower()
+    query_terms = query.lower().split()
+    return all(term in title for term in query_terms)
+
+def scrape_source(source, query, pool=None, ready_timeout=None, limit=None):
+    """Run one site's scraper and return (products, scrape info such as the fetch path).
+
+    A driver is only held for the duration of the scrape, and only if the
+    Selenium path is needed.
+    """
+    scraper = SCRAPERS[source](pool=pool, max_products=limit or DEFAULT_LIMIT, ready_timeout=ready_timeout)
+    try:
+        return scraper.scrape(query), scraper.scrape_info()
+    finally:
+        scraper.close()
+
+def run_source(source, query, pool=None, ready_timeout=None, limit=None):
+    """Scrape one source and return (relevant products, status)."""
+    started = time.monotonic()
+    source_products, info = scrape_source(source, query, pool, ready_timeout, limit)
+    return _source_result(source, query, source_products, info, started)
+
+def _source_result(source, query, source_products, info, started):
+    filter_started = time.perf_counter()
+    filtered_products = [p for p in source_products if is_relevant_product(p, query)]
+    info["timings_ms"]["filter"] = round((time.perf_counter() - filter_started) * 1000, 1)
+    if filtered_products:
+        logger.debug("Found %d relevant %s products", len(filtered_products), source)
+    return filtered_products, dict(
+        info,
+        status="ok" if filtered_products else "empty",
+        count=len(filtered_products),
+        elapsed_ms=_elapsed_ms(started),
+    )
+
+def _run_and_cache(source, query, pool, cache, ready_timeout=None, limit=None):
+    source_products, status = run_source(source, query, pool, ready_timeout, limit)
+    _cache_result(cache, query, source, source_products, status)
+    return source_products, status
+
+def set_job_queue(job_queue):
+    """Route scrapes through a jobqueue.ScrapeQueue instead of scraping in this process."""
+    global _job_queue
+    _job_queue = job_queue
+
+def set_price_history(price_history):
+    """Record the prices of every scrape this process runs (cache hits and joined scrapes are not scrapes)."""
+    global _price_history
+    _price_history = price_history
+
+def _cache_result(cache, query, source, source_products, status):
+    # Only the caller that ran a scrape gets here, so each scrape is recorded once however many searches joined it
+    if _price_history is not None and source_products:
+        _price_history.record(query, source_products)
+    # Failed scrapes come back empty; caching them would hide the source until the TTL expires
+    if cache is not None and "error" not in status:
+        cache.set(query, source, {"products": source_products, "status": status})
+
+def _submit_sources(sources, query, pool, cache, limit):
+    """Start scrapes for the given sources, joining any already in flight.
+
+    Returns {source: (future, joined)}; each future resolves to
+    (relevant products, status). Raises QueueFull when a worker queue is
+    configured and cannot take the new jobs.
+    """
+    # Readiness waits adapt to each source's observed latency
+    ready_timeouts = {source: health_registry.get(source).adaptive_timeout() for source in sources}
+    if _job_queue is not None:
+        submitted = _submit_to_queue(sources, query, cache, ready_timeouts, limit)
+    elif BROWSER_MODE == "multitab":
+        submitted = _submit_multitab(sources, query, pool, cache, ready_timeouts, limit)
+    else:
+        submitted = {}
+        for source in sources:
+            key = (normalize_query(query), source, limit)
+            future, joined = _inflight.submit(key, _executor, _run_and_cache, source, query, pool, cache, ready_timeouts[source], limit)
+            if joined:
+                logger.debug("Joined in-flight %s scrape for query: %s", source, query)
+            submitted[source] = (future, joined)
+
+    # Only the caller that started a scrape feeds its outcome into health and metrics
+    for source, (future, joined) in submitted.items():
+        if not joined:
+            future.add_done_callback(lambda done, source=source: _record_outcome(done, source))
+    return submitted
+
+def _record_outcome(future, source):
+    health = health_registry.get(source)
+    if not future.cancelled() and isinstance(future.exception(), QueueFull):
+        health.release_trial()  # Never ran, so it says nothing about the source
+        return
+    if future.cancelled() or future.exception() is not None:
+        health.record(False)
+        return
+    _, status = future.result()
+    timings = status.get("timings_ms", {})
+    ready_ms = timings.get("ready")
+    health.record(
+        "error" not in status,
+        status.get("elapsed_ms", 0) / 1000,
+        ready_ms / 1000 if status.get("path") == "selenium" and ready_ms is not None else None,
+    )
+    metrics.SOURCE_SECONDS.observe(status.get("elapsed_ms", 0) / 1000, source=source, path=status.get("path", ""))
+    for stage, ms in timings.items():
+        metrics.STAGE_SECONDS.observe(ms / 1000, source=source, stage=stage)
+
+def _submit_to_queue(sources, query, cache, ready_timeouts, limit):
+    claims = {source: _inflight.claim((normalize_query(query), source, limit)) for source in sources}
+    owned = [source for source, (_, owner) in claims.items() if owner]
+    if len(owned) > _job_queue.free_slots():
+        error = _job_queue.reject()
+        for source in owned:
+            claims[source][0].set_exception(error)
+        raise error
+
+    for source in owned:
+        future = claims[source][0]
+        try:
+            job = _job_queue.submit(source, query, ready_timeouts[source], limit)
+        except Exception as e:
+            future.set_exception(e)
+            continue
+        job.add_done_callback(lambda done, source=source, future=future: _resolve_job(done, future, source, query, cache))
+    return {source: (future, not owner) for source, (future, owner) in claims.items()}
+
+def _resolve_job(job, future, source, query, cache):
+    if job.exception() is not None:
+        future.set_exception(job.exception())
+        return
+    source_products, status = job.result()
+    _cache_result(cache, query, source, source_products, status)
+    future.set_result((source_products, status))
+
+def _submit_multitab(sources, query, pool, cache, ready_timeouts, limit):
+    submitted = {}
+    owned = {}
+    for source in sources:
+        future, owner = _inflight.claim((normalize_query(query), source, limit))
+        submitted[source] = (future, not owner)
+        if owner:
+            owned[source] = future
+        else:
+            logger.debug("Joined in-flight %s scrape for query: %s", source, query)
+    if owned:
+        _executor.submit(_run_multitab, owned, query, pool, cache, ready_timeouts, limit)
+    return submitted
+
+def _run_multitab(futures, query, pool, cache, ready_timeouts, limit):
+    """Serve what the HTTP fast path can, then scrape the rest in tabs of one browser."""
+    started = time.monotonic()
+
+    def publish(scraper, products):
+        source_products, status = _source_result(scraper.SOURCE, query, products, scraper.scrape_info(), started)
+        _cache_result(cache, query, scraper.SOURCE, source_products, status)
+        futures[scraper.SOURCE].set_result((source_products, status))
+
+    try:
+        needs_browser = []
+        for source in futures:
+            scraper = SCRAPERS[source](pool=pool, max_products=limit, ready_timeout=ready_timeouts[source])
+            products = scraper.scrape_fast_path(query)
+            if products is None:
+                needs_browser.append(scraper)
+            else:
+                publish(scraper, products)
+        if not needs_browser:
+            return
+
+        driver_started = time.perf_counter()
+        driver = pool.acquire() if pool else create_chrome_driver()
+        driver_ms = round((time.perf_counter() - driver_started) * 1000, 1)
+        for scraper in needs_browser:
+            scraper.timings["driver"] = driver_ms
+        try:
+            scrape_in_tabs(driver, needs_browser, query, publish)
+        finally:
+            if pool:
+                pool.release(driver)
+            else:
+                driver.quit()
+    except Exception as e:
+        logger.error("Error in multi-tab scrape for query %s: %s", query, e)
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(e)
+
+def _refresh_in_background(source, query, pool, cache, limit):
+    if not health_registry.get(source).allow_request():
+        return
+    try:
+        future, joined = _submit_sources([source], query, pool, cache, limit)[source]
+    except QueueFull:
+        health_registry.get(source).release_trial()
+        logger.info("Skipping background refresh of %s, scrape queue is full", source)
+        return
+    if not joined:
+        future.add_done_callback(lambda done: _log_refresh_failure(done, source, query))
+
+def _log_refresh_failure(future, source, query):
+    if future.exception() is not None:
+        logger.warning("Background refresh of %s failed for query %s: %s", source, query, future.exception())
+
+def iter_search(query, pool=None, sources=None, deadline=None, cache=None, limit=None, cache_only=False):
+    """Scrape all sources in parallel, yielding each source's result as it lands.
+
+    Yields {"type": "source", "source", "products", "status"} events in
+    completion order (cached sources first), then one {"type": "summary"}
+    event with every source's status and the total elapsed time.
+
+    Sources that miss their budget or the overall deadline are reported with a
+    "timeout" status; their scrape keeps running in the background and releases
+    its driver when done, but never holds up the response. With a cache, fresh
+    and stale entries are served without scraping, and stale ones are refreshed
+    in the background. Identical scrapes already in flight are joined rather
+    than started again, per source.
+
+    Each source returns up to ``limit`` products (DEFAULT_LIMIT if None); a
+    cached result only counts when it was scraped with at least that limit.
+    With ``cache_only``, sources without a usable cache entry are reported as
+    "uncached" instead of being scraped.
+    """
+    sources = list(sources or SCRAPERS)
+    limit = limit or DEFAULT_LIMIT
+    deadline = SEARCH_DEADLINE if deadline is None else deadline
+    started = time.monotonic()
+    request_deadline = started + deadline
+
+    statuses = {}
+    cached_events = []
+    to_scrape = []
+    for source in sources:
+        entry = cache.get(query, source) if cache is not None else None
+        if entry is not None and entry[0]["status"].get("limit", DEFAULT_LIMIT) < limit:
+            entry = None  # Too shallow for this request; the deeper scrape replaces it
+        if cache is not None:
+            metrics.CACHE_LOOKUPS.inc(source=source, result=entry[1] if entry else "miss")
+        if entry is None and cache_only:
+            statuses[source] = {"status": "uncached", "count": 0, "elapsed_ms": 0, "cache": "miss"}
+            cached_events.append({"type": "source", "source": source, "products": [], "status": statuses[source]})
+            continue
+        if entry is None:
+            if health_registry.get(source).allow_request():
+                to_scrape.append(source)
+                continue
+            # Circuit open: skip the source instead of waiting out its timeouts
+            logger.info("Skipping %s for query %s: circuit breaker open", source, query)
+            statuses[source] = {"status": "skipped", "count": 0, "elapsed_ms": 0, "cache": "miss"}
+            cached_events.append({"type": "source", "source": source, "products": [], "status": statuses[source]})
+            continue
+        value, state, age = entry
+        if state == ResultCache.STALE:
+            # Refresh at the cached depth so a shallow request doesn't truncate the entry
+            _refresh_in_background(source, query, pool, cache, value["status"].get("limit", limit))
+        source_products = value["products"][:limit]
+        statuses[source] = dict(value["status"], count=len(source_products), cache=state, age=int(age))
+        cached_events.append({"type": "source", "source": source, "products": source_products, "status": statuses[source]})
+
+    pending = {}
+    source_deadlines = {}
+    coalesced = set()
+    try:
+        submitted = _submit_sources(to_scrape, query, pool, cache, limit)
+    except QueueFull:
+        for source in to_scrape:
+            health_registry.get(source).release_trial()
+        raise
+    for source, (future, joined) in submitted.items():
+        pending[future] = source
+        source_deadlines[source] = min(request_deadline, started + SOURCE_BUDGETS.get(source, deadline))
+        if joined:
+            coalesced.add(source)
+
+    yield from cached_events
+
+    while pending:
+        now = time.monotonic()
+        for future, source in list(pending.items()):
+            if source_deadlines[source] <= now and not future.done():
+                del pending[future]
+                logger.warning("%s missed its %.1fs budget for query: %s", source, source_deadlines[source] - started, query)
+                statuses[source] = {"status": "timeout", "count": 0, "elapsed_ms": _elapsed_ms(started), "cache": "miss"}
+                yield {"type": "source", "source": source, "products": [], "status": statuses[source]}
+        if not pending:
+            break
+
+        next_deadline = min(source_deadlines[source] for source in pending.values())
+        done, _ = wait(pending, timeout=max(0, next_deadline - now), return_when=FIRST_COMPLETED)
+        for future in done:
+            source = pending.pop(future)
+            try:
+                source_products, status = future.result()
+            except Exception as e:
+                logger.error("Error scraping %s: %s", source, e)
+                statuses[source] = {"status": "error", "count": 0, "elapsed_ms": _elapsed_ms(started), "cache": "miss", "error": str(e)}
+                yield {"type": "source", "source": source, "products": [], "status": statuses[source]}
+                continue
+            statuses[source] = dict(status, cache="miss", coalesced=source in coalesced)
+            yield {"type": "source", "source": source, "products": source_products, "status": statuses[source]}
+
+    for source in sources:
+        statuses[source]["breaker"] = health_registry.get(source).state
+        metrics.SOURCE_RESULTS.inc(source=source, status=statuses[source]["status"])
+    yield {
+        "type": "summary",
+        "sources": {source: statuses[source] for source in sources},
+        "count": sum(statuses[source]["count"] for source in sources),
+        "elapsed_ms": _elapsed_ms(started),
+    }
+
+def search(query, pool=None, sources=None, deadline=None, cache=None, limit=None, cache_only=False):
+    """Run iter_search to completion and return (products, per-source status).
+
+    Products keep the source order (Flipkart, Amazon, Croma) regardless of
+    which site answered first.
+    """
+    by_source = {}
+    statuses = {}
+    for event in iter_search(query, pool=pool, sources=sources, deadline=deadline, cache=cache, limit=limit, cache_only=cache_only):
+        if event["type"] == "source":
+            by_source[event["source"]] = event["products"]
+        else:
+            statuses = event["sources"]
+    products = [product for source in statuses for product in by_source.get(source, [])]
+    return products, statuses
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+def _elapsed_ms(started):
+    return int((time.monotonic() - started) * 1000)
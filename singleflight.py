@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key onto one in-flight future.
+
+    The first caller for a key submits the work; callers arriving before it
+    finishes get the same future back. Once the work completes the key is
+    forgotten, so later calls start fresh.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, executor, fn, *args):
+        """Return (future, joined) where joined is True if an existing call was reused."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, True
+            future = executor.submit(fn, *args)
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, False
+
+    def claim(self, key):
+        """Return (future, owner). The owner must resolve the future; others just wait on it."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, True
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._inflight)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
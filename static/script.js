@@ -1,4 +1,10 @@
-let currentProducts = [];
+const API_BASE = 'http://127.0.0.1:5001/api';
+const PAGE_SIZE = 24;
+
+let currentProducts = [];  // Products currently rendered, in display order
+let currentSort = null;  // 'price' | 'price_desc' | 'rating' | null; applied to products as they stream in
+let currentQuery = '';
+let nextCursor = null;
 
 const toggleLoader = (show) => {
     const loader = document.getElementById('loader');
@@ -27,6 +33,7 @@ const toggleSortOptions = () => {
 const createProductCard = (product) => {
     const card = document.createElement('div');
     card.className = 'product-card';
+    card.dataset.key = productKey(product);
     const title = product.title || 'N/A';
     const price = product.price ? `₹${product.price.toFixed(2)}` : 'N/A';
     const source = product.source || 'N/A';
@@ -47,69 +54,220 @@ const createProductCard = (product) => {
     return card;
 };
 
-const displayProducts = (products) => {
-    const productList = document.getElementById('product-list');
-    if (!productList) {
-        console.error('Product list element not found!');
-        showMessage('Error: Product list element not found on the page.');
-        return;
+const showSourceWarnings = (sources) => {
+    if (!sources) return;
+    const failed = Object.entries(sources)
+        .filter(([, info]) => info.status === 'timeout' || info.status === 'error')
+        .map(([source, info]) => `${source} (${info.status})`);
+    if (failed.length > 0) {
+        showMessage(`Some stores did not respond in time: ${failed.join(', ')}`);
     }
+};
 
-    productList.innerHTML = '';
-    if (!products || products.length === 0) {
-        showMessage('No products found.');
-        return;
-    }
+const productKey = (product) => product.link && product.link !== 'N/A' ? product.link : `${product.source}:${product.title}`;
+
+const ratingValue = (product) => product.rating === 'N/A' ? -Infinity : parseFloat(product.rating);
+
+// Unparsed prices come back as 0; like the server, they sort last in either direction
+const priceValue = (product) => typeof product.price === 'number' && product.price > 0 ? product.price : null;
+
+const byPrice = (direction) => (a, b) => {
+    const priceA = priceValue(a);
+    const priceB = priceValue(b);
+    if (priceA === null || priceB === null) return (priceA === null) - (priceB === null);
+    return direction * (priceA - priceB);
+};
+
+// Only used to place products while they stream in; the server orders everything else
+const comparators = {
+    price: byPrice(1),
+    price_desc: byPrice(-1),
+    rating: (a, b) => ratingValue(b) - ratingValue(a),
+};
+
+const applySort = (sortKey) => {
+    currentSort = sortKey;
+    document.getElementById('sort-options').style.display = 'none';
+    if (currentQuery) loadPage(true);
+};
+
+const sortByRating = () => applySort('rating');
+
+const sortByPrice = () => applySort('price');
 
+const sortByPriceDesc = () => applySort('price_desc');
+
+const applyFilters = () => {
+    if (currentQuery) loadPage(true);
+};
+
+const currentFilters = () => {
+    const params = new URLSearchParams();
+    const value = (id) => (document.getElementById(id) || {}).value || '';
+    if (value('min-price')) params.set('min_price', value('min-price'));
+    if (value('max-price')) params.set('max_price', value('max-price'));
+    if (value('min-rating')) params.set('min_rating', value('min-rating'));
+    const sources = Array.from(document.querySelectorAll('.source-filter:checked')).map(input => input.value);
+    const allSources = document.querySelectorAll('.source-filter').length;
+    if (sources.length > 0 && sources.length < allSources) params.set('source', sources.join(','));
+    return params;
+};
+
+// Make the product list show exactly `products`, reusing cards that are already rendered
+// and only moving, adding or removing the ones that changed
+const patchProductList = (products) => {
+    const productList = document.getElementById('product-list');
+    if (!productList) return;
+    const existing = new Map(Array.from(productList.children).map(card => [card.dataset.key, card]));
+
+    products.forEach((product, index) => {
+        const key = productKey(product);
+        let card = existing.get(key);
+        existing.delete(key);
+        if (!card) {
+            try {
+                card = createProductCard(product);
+            } catch (error) {
+                console.error('Error creating product card:', error);
+                return;
+            }
+        }
+        if (productList.children[index] !== card) {
+            productList.insertBefore(card, productList.children[index] || null);
+        }
+    });
+    existing.forEach(card => card.remove());
+    currentProducts = products.slice();
+};
+
+const appendProducts = (products) => {
+    const productList = document.getElementById('product-list');
+    if (!productList) return;
+    const fragment = document.createDocumentFragment();
     products.forEach(product => {
         try {
-            const card = createProductCard(product);
-            productList.appendChild(card);
+            fragment.appendChild(createProductCard(product));
+            currentProducts.push(product);
         } catch (error) {
             console.error('Error creating product card:', error);
-            showMessage(`Error displaying product: ${error.message}`);
         }
     });
+    productList.appendChild(fragment);
 };
 
-const sortByRating = () => {
-    if (currentProducts.length > 0) {
-        currentProducts.sort((a, b) => {
-            const ratingA = a.rating === 'N/A' ? -Infinity : parseFloat(a.rating);
-            const ratingB = b.rating === 'N/A' ? -Infinity : parseFloat(b.rating);
-            return ratingB - ratingA;
-        });
-        displayProducts(currentProducts);
-    }
-    document.getElementById('sort-options').style.display = 'none';
+const updatePager = (total) => {
+    const loadMore = document.getElementById('load-more');
+    if (loadMore) loadMore.style.display = nextCursor ? 'block' : 'none';
+    const count = document.getElementById('result-count');
+    if (count) count.textContent = total ? `Showing ${currentProducts.length} of ${total}` : '';
 };
 
-const sortByPrice = () => {
-    if (currentProducts.length > 0) {
-        currentProducts.sort((a, b) => a.price - b.price);
-        displayProducts(currentProducts);
+// Fetch one page of the current query, sorted and filtered server-side over cached results.
+// reset replaces the rendered page; otherwise the next page is appended.
+const loadPage = async (reset) => {
+    if (!reset && !nextCursor) return;
+    const params = currentFilters();
+    params.set('q', currentQuery);
+    params.set('cached', '1');
+    params.set('page_size', PAGE_SIZE);
+    if (currentSort) params.set('sort', currentSort);
+    if (!reset) params.set('cursor', nextCursor);
+    try {
+        // Repeated pages are revalidated with the ETag, so an unchanged page costs a 304
+        const response = await fetch(`${API_BASE}/search?${params}`);
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || `HTTP error! Status: ${response.status}`);
+        if (reset) patchProductList(data.products);
+        else appendProducts(data.products);
+        nextCursor = data.next_cursor;
+        updatePager(data.total);
+        showMessage(reset && data.total === 0 ? 'No products match these filters.' : '');
+    } catch (error) {
+        console.error('Page load error:', error);
+        showMessage(`Error: ${error.message}`);
     }
-    document.getElementById('sort-options').style.display = 'none';
+};
+
+const loadMore = () => loadPage(false);
+
+// Insert newly streamed products into currentProducts and the DOM, keeping the active sort order
+const addProducts = (products) => {
+    const productList = document.getElementById('product-list');
+    if (!productList) return;
+
+    products.forEach(product => {
+        let index = currentProducts.length;
+        if (currentSort) {
+            const compare = comparators[currentSort];
+            index = currentProducts.findIndex(existing => compare(product, existing) < 0);
+            if (index === -1) index = currentProducts.length;
+        }
+        if (index >= PAGE_SIZE) return;  // Only the first page is rendered; the rest is paged in
+        try {
+            const card = createProductCard(product);
+            productList.insertBefore(card, productList.children[index] || null);
+            currentProducts.splice(index, 0, product);
+            if (currentProducts.length > PAGE_SIZE) {
+                currentProducts.pop();
+                productList.lastElementChild.remove();
+            }
+        } catch (error) {
+            console.error('Error creating product card:', error);
+            showMessage(`Error displaying product: ${error.message}`);
+        }
+    });
 };
 
 const searchProducts = async (query) => {
     toggleLoader(true);
     showMessage('');
+    currentProducts = [];
+    currentQuery = query;
+    nextCursor = null;
+    updatePager(0);
+    const productList = document.getElementById('product-list');
+    if (productList) productList.innerHTML = '';
     try {
-        const url = `http://127.0.0.1:5001/api/search?q=${encodeURIComponent(query)}`;
-        const response = await fetch(url, {
-            method: 'GET',
-            headers: { 'Content-Type': 'application/json' },
-        });
+        const url = `${API_BASE}/search/stream?q=${encodeURIComponent(query)}`;
+        const response = await fetch(url, { method: 'GET' });
 
         if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
-        const products = await response.json();
 
-        if (products.error) throw new Error(products.error);
-        if (!Array.isArray(products)) throw new Error('Invalid response format: Expected an array of products');
+        // NDJSON: one event per line, rendered as soon as each store responds
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let summary = null;
+
+        const handleLine = (line) => {
+            if (!line.trim()) return;
+            const event = JSON.parse(line);
+            if (event.type === 'error') throw new Error(event.error);
+            if (event.type === 'source') {
+                if (!Array.isArray(event.products)) throw new Error('Invalid response format: Expected an array of products');
+                addProducts(event.products);
+            } else if (event.type === 'summary') {
+                summary = event;
+            }
+        };
 
-        currentProducts = products;
-        displayProducts(products);
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.forEach(handleLine);
+        }
+        handleLine(buffer + decoder.decode());
+
+        if (currentProducts.length === 0) {
+            showMessage('No products found.');
+        } else {
+            // Hand ordering, filters and paging over to the server now that results are cached
+            await loadPage(true);
+        }
+        if (summary) showSourceWarnings(summary.sources);
     } catch (error) {
         console.error('Search error:', error);
         showMessage(`Error: ${error.message}`);
@@ -0,0 +1,33 @@
+from cache import ResultCache
+
+def test_queries_differing_in_case_and_spacing_share_entries():
+    cache = ResultCache()
+    cache.set("iPhone  15", "Amazon", {"products": []})
+    value, state, _ = cache.get(" iphone 15 ", "Amazon")
+    assert state == ResultCache.FRESH
+
+def test_entries_go_stale_then_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("cache.time.time", lambda: now[0])
+    cache = ResultCache(default_ttl=10, stale_grace=5)
+    cache.set("tv", "Croma", {"products": []})
+    now[0] += 12
+    assert cache.get("tv", "Croma")[1] == ResultCache.STALE
+    now[0] += 5
+    assert cache.get("tv", "Croma") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.set("a", "Amazon", 1)
+    cache.set("b", "Amazon", 2)
+    cache.get("a", "Amazon")
+    cache.set("c", "Amazon", 3)
+    assert cache.get("b", "Amazon") is None
+    assert cache.get("a", "Amazon") is not None
+
+def test_entries_survive_a_restart_with_a_database(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = ResultCache(db_path=db_path)
+    cache.set("tv", "Amazon", {"products": [{"title": "tv"}]})
+    cache.close()
+    assert ResultCache(db_path=db_path).get("tv", "Amazon")[0] == {"products": [{"title": "tv"}]}
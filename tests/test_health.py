@@ -0,0 +1,51 @@
+import time
+
+from health import SourceHealth
+
+def open_breaker(cooldown=0.05):
+    health = SourceHealth("Test", min_samples=3, failure_threshold=0.5, cooldown=cooldown)
+    for _ in range(3):
+        health.record(False)
+    return health
+
+def test_breaker_opens_on_failures_and_blocks_requests():
+    health = open_breaker(cooldown=60)
+    assert health.state == SourceHealth.OPEN
+    assert not health.allow_request()
+
+def test_half_open_allows_a_single_trial():
+    health = open_breaker()
+    time.sleep(0.06)
+    assert health.allow_request()
+    assert health.state == SourceHealth.HALF_OPEN
+    assert not health.allow_request()
+
+def test_successful_trial_closes_the_breaker():
+    health = open_breaker()
+    time.sleep(0.06)
+    health.allow_request()
+    health.record(True)
+    assert health.state == SourceHealth.CLOSED
+    assert health.allow_request()
+
+def test_failed_trial_reopens_the_breaker():
+    health = open_breaker()
+    time.sleep(0.06)
+    health.allow_request()
+    health.record(False)
+    assert health.state == SourceHealth.OPEN
+    assert not health.allow_request()
+
+def test_released_trial_can_be_retried():
+    health = open_breaker()
+    time.sleep(0.06)
+    assert health.allow_request()
+    health.release_trial()
+    assert health.allow_request()
+
+def test_trial_without_an_outcome_is_abandoned_after_cooldown():
+    health = open_breaker()
+    time.sleep(0.06)
+    assert health.allow_request()
+    time.sleep(0.06)
+    assert health.allow_request()
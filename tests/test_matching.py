@@ -0,0 +1,41 @@
+import matching
+
+def offer(title, price, source):
+    return {"title": title, "price": price, "source": source, "link": f"{source}/{title}"}
+
+def test_normalize_title():
+    attributes = matching.normalize_title("Apple iPhone 15 Pro (Black Titanium, 256 GB)")
+    assert attributes["brand"] == "apple"
+    assert attributes["model"] == ["iphone", "15", "pro"]
+    assert attributes["storage_gb"] == 256
+    assert attributes["color"] == "black titanium"
+
+def test_same_product_across_stores_is_grouped_with_cheapest_offer():
+    groups = matching.group_products([
+        offer("Apple iPhone 15 (Black, 128 GB)", 69900.0, "Flipkart"),
+        offer("Apple iPhone 15 (128 GB) - Black", 65999.0, "Amazon"),
+        offer("Apple iPhone 15 128GB Black", 0.0, "Croma"),
+    ])
+    assert len(groups) == 1
+    group = groups[0]
+    assert group["sources"] == ["Amazon", "Croma", "Flipkart"]
+    # The unparsed 0.0 price is neither the cheapest offer nor part of the spread
+    assert group["cheapest"]["source"] == "Amazon"
+    assert (group["price_min"], group["price_max"]) == (65999.0, 69900.0)
+    assert group["offers"][-1]["source"] == "Croma"
+
+def test_variants_are_kept_apart():
+    groups = matching.group_products([
+        offer("Apple iPhone 15 (Black, 128 GB)", 69900.0, "Flipkart"),
+        offer("Apple iPhone 15 Pro (Black, 128 GB)", 127900.0, "Amazon"),
+        offer("Apple iPhone 15 Plus (Black, 128 GB)", 79900.0, "Croma"),
+    ])
+    assert sorted(group["model"] for group in groups) == ["iphone 15", "iphone 15 plus", "iphone 15 pro"]
+
+def test_storage_and_color_are_kept_apart():
+    groups = matching.group_products([
+        offer("Apple iPhone 15 (Black, 128 GB)", 69900.0, "Flipkart"),
+        offer("Apple iPhone 15 (Black, 256 GB)", 79900.0, "Amazon"),
+        offer("Apple iPhone 15 (Blue, 128 GB)", 69900.0, "Croma"),
+    ])
+    assert len(groups) == 3
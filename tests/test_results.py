@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+import results
+
+def product(link, price=100.0, rating=4.0, source="Amazon"):
+    return {"title": f"phone {link}", "link": link, "price": price, "rating": rating, "source": source}
+
+def pages(products, **params):
+    """Walk every page of a listing, returning the links in order."""
+    links, cursor = [], None
+    while True:
+        listing = results.select(products, "phone", page_size=3, cursor=cursor, **params)
+        links.extend(item["link"] for item in listing["products"])
+        cursor = listing["next_cursor"]
+        if cursor is None:
+            return links
+
+def test_cursor_pages_cover_every_product_once_in_order():
+    products = [product(f"l{i}", price=float(i % 4 + 1)) for i in range(10)]
+    links = pages(products, sort="price")
+    assert sorted(links) == sorted(item["link"] for item in products)
+    prices = [next(item["price"] for item in products if item["link"] == link) for link in links]
+    assert prices == sorted(prices)
+
+def test_cursor_round_trip():
+    key = (12.5, "link", "title", 3)
+    assert results.decode_cursor(results.encode_cursor("scope", key), "scope") == key
+
+def test_cursor_key_survives_infinity():
+    key = (math.inf, "link", "title", 0)
+    assert results.decode_cursor(results.encode_cursor("scope", key), "scope") == key
+
+@pytest.mark.parametrize("cursor", ["not base64!", "e30", results.encode_cursor("scope", ("x", 1))])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        results.decode_cursor(cursor, "scope")
+
+@pytest.mark.parametrize("key", [(1.0, "a", "b"), ("x", "a", "b", 0), (1.0, "a", "b", True), (1.0, 2, "b", 0)])
+def test_cursor_keys_of_the_wrong_shape_are_rejected(key):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        results.decode_cursor(results.encode_cursor("scope", key), "scope")
+
+def test_cursor_from_another_listing_is_rejected():
+    products = [product(f"l{i}") for i in range(5)]
+    cursor = results.select(products, "phone", sort="price", page_size=2)["next_cursor"]
+    with pytest.raises(ValueError, match="different"):
+        results.select(products, "phone", sort="rating", page_size=2, cursor=cursor)
+
+def test_unknown_sort_is_rejected():
+    with pytest.raises(ValueError):
+        results.select([], "phone", sort="bogus")
+
+@pytest.mark.parametrize("sort, expected", [
+    ("price", ["cheap", "dear", "unparsed"]),
+    ("price_desc", ["dear", "cheap", "unparsed"]),
+])
+def test_unparsed_prices_sort_last_in_both_directions(sort, expected):
+    products = [product("unparsed", price=0.0), product("dear", price=500.0), product("cheap", price=50.0)]
+    assert [item["link"] for item in results.select(products, "phone", sort=sort)["products"]] == expected
+
+def test_unknown_ratings_sort_last():
+    products = [product("none", rating="N/A"), product("low", rating=3.5), product("high", rating=4.8)]
+    assert [item["link"] for item in results.select(products, "phone", sort="rating")["products"]] == ["high", "low", "none"]
+
+def test_filters():
+    products = [
+        product("a", price=50.0, rating=4.5, source="Amazon"),
+        product("b", price=150.0, rating=4.5, source="Amazon"),
+        product("c", price=80.0, rating=3.0, source="Amazon"),
+        product("d", price=80.0, rating=4.5, source="Croma"),
+        product("e", price=0.0, rating=4.5, source="Amazon"),
+    ]
+    listing = results.select(products, "phone", min_price=60, max_price=100, min_rating=4, sources={"Croma"})
+    assert [item["link"] for item in listing["products"]] == ["d"]
+    # A price filter drops products whose price couldn't be parsed
+    assert [item["link"] for item in results.filter_products(products, max_price=100)] == ["a", "c", "d"]
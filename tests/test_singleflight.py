@@ -0,0 +1,35 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call_and_the_key_is_forgotten():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "done"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first, joined_first = flight.submit("key", executor, work)
+        second, joined_second = flight.submit("key", executor, work)
+        assert (joined_first, joined_second) == (False, True)
+        assert first is second
+        release.set()
+        assert first.result(5) == "done"
+        assert flight.in_flight() == 0
+        third, joined_third = flight.submit("key", executor, work)
+        third.result(5)
+    assert not joined_third
+    assert len(calls) == 2
+
+def test_failed_claim_is_forgotten():
+    flight = SingleFlight()
+    future, owner = flight.claim("key")
+    assert owner
+    assert flight.claim("key") == (future, False)
+    future.set_exception(RuntimeError("worker died"))
+    assert flight.claim("key")[1]
@@ -0,0 +1,131 @@
+"""Scheduled price tracking.
+
+Watches are stored in the PriceHistory database. A watch is a query,
+optionally narrowed to one source and/or one product link (a link is
+tracked by re-running the query it was found under, so the existing
+search scrapers are reused as-is; give such watches a result_limit deep
+enough to include the product). The scheduler wakes every
+``poll_interval`` seconds, starts due watches on a bounded worker pool and
+reschedules each one ``interval`` seconds out with random jitter, so
+watches added together don't keep hitting the sites in lockstep. Prices
+are recorded by search itself (search.set_price_history), once per scrape,
+whether the watch ran it or joined one already in flight.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from history import PriceHistory
+from jobqueue import QueueFull
+
+logger = logging.getLogger(__name__)
+
+class WatchScheduler:
+    def __init__(self, history, search_service, pool=None, concurrency=2, jitter=0.1, poll_interval=5, retry_delay=60):
+        self.history = history
+        self.search_service = search_service
+        self.pool = pool
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="watch")
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._counts = {"runs": 0, "failed": 0, "products": 0}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="watch-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Watch scheduler started (concurrency {self.concurrency})")
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts, running=len(self._running), concurrency=self.concurrency)
+
+    def next_run(self, interval, now=None):
+        spread = interval * self.jitter
+        return (now or time.time()) + interval + random.uniform(-spread, spread)
+
+    def run_due(self, now=None):
+        """Start due watches while worker slots are free; returns how many were started."""
+        with self._lock:
+            free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        started = 0
+        for watch in self.history.due_watches(now, limit=free + len(self._running)):
+            with self._lock:
+                if watch["id"] in self._running or len(self._running) >= self.concurrency:
+                    continue
+                self._running.add(watch["id"])
+            self._executor.submit(self._run_watch, watch)
+            started += 1
+        return started
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_due()
+            except Exception as e:
+                logger.error(f"Error scheduling watches: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    def _run_watch(self, watch):
+        next_run = self.next_run(watch["interval"])
+        try:
+            sources = [watch["source"]] if watch["source"] else None
+            products, _ = self.search_service.search(watch["query"], pool=self.pool, sources=sources, limit=watch["result_limit"])
+            if watch["link"]:
+                products = [product for product in products if product.get("link") == watch["link"]]
+            with self._lock:
+                self._counts["runs"] += 1
+                self._counts["products"] += len(products)
+            logger.info("Watch %s (%s) found %d products", watch["id"], watch["query"], len(products))
+        except QueueFull as e:
+            next_run = time.time() + e.retry_after  # Scrape tier is busy; come back once it drains
+        except Exception as e:
+            logger.error(f"Error running watch {watch['id']} ({watch['query']}): {str(e)}")
+            next_run = time.time() + min(self.retry_delay, watch["interval"])
+            with self._lock:
+                self._counts["failed"] += 1
+        finally:
+            try:
+                self.history.reschedule(watch["id"], next_run)
+            finally:
+                with self._lock:
+                    self._running.discard(watch["id"])
+
+def from_environment():
+    """The configured PriceHistory, or None to keep no price history (PRICE_SCOUT_HISTORY_DB unset)."""
+    db_path = os.environ.get("PRICE_SCOUT_HISTORY_DB")
+    if not db_path:
+        return None
+    return PriceHistory(
+        db_path,
+        batch_size=int(os.environ.get("PRICE_SCOUT_HISTORY_BATCH", "500")),
+        flush_interval=float(os.environ.get("PRICE_SCOUT_HISTORY_FLUSH", "2")),
+    )
+
+def scheduler_from_environment(history, search_service, pool=None):
+    return WatchScheduler(
+        history,
+        search_service,
+        pool=pool,
+        concurrency=int(os.environ.get("PRICE_SCOUT_WATCH_CONCURRENCY", "2")),
+        jitter=float(os.environ.get("PRICE_SCOUT_WATCH_JITTER", "0.1")),
+        poll_interval=float(os.environ.get("PRICE_SCOUT_WATCH_POLL", "5")),
+    )